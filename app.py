@@ -1,14 +1,20 @@
-import gradio as gr
+import os
+from components.metrics import mount_metrics, register_gauge
+from components.model_registry import get_status, start_warm_up, startup_phase, startup_report, status_markdown
 
-# Import tabs from modular files
-from components.style import custom_css
-from tabs.therapy_chat import therapy_chat_tab
-from tabs.faq_assistant import faq_assistant_tab
-from tabs.image_ocr_llm import image_ocr_llm_tab
-from tabs.symptom_checker import symptom_checker_tab
+with startup_phase("import gradio"):
+    import gradio as gr
+
+# Import tabs from modular files (models are registered here, not loaded)
+with startup_phase("import tabs"):
+    from components.style import custom_css
+    from tabs.therapy_chat import therapy_chat_tab
+    from tabs.faq_assistant import faq_assistant_tab
+    from tabs.image_ocr_llm import image_ocr_llm_tab
+    from tabs.symptom_checker import symptom_checker_tab
 
 # Main Gradio UI
-with gr.Blocks(css=custom_css) as demo:
+with startup_phase("build UI"), gr.Blocks(css=custom_css) as demo:
 
     # 📌 Global disclaimer & note
     gr.Markdown(
@@ -33,8 +39,27 @@ with gr.Blocks(css=custom_css) as demo:
 
     with gr.Tab("🧾 Report Analyzer"):
         image_ocr_llm_tab()
+
+    # 🩺 Which models are loaded so far (warm-up continues in the background)
+    with gr.Accordion("🩺 Model Status", open=False):
+        model_status = gr.Markdown(status_markdown())
+        refresh_status = gr.Button("Refresh")
+    refresh_status.click(status_markdown, outputs=model_status, queue=False)
+    demo.load(status_markdown, outputs=model_status, queue=False)
     
     gr.Markdown("Made by Ravi⚡️", elem_classes="centered-text")
 
-# Launch the app
-demo.launch()
\ No newline at end of file
+# Launch the app, then preload models in priority order while it serves requests
+with startup_phase("launch"):
+    demo.launch(prevent_thread_lock=True)
+
+# Prometheus metrics (per-stage latency histograms, request counters, model state) at /metrics
+if os.getenv("METRICS", "1") == "1":
+    register_gauge("therapybot_model_ready", "1 once a registered model has loaded",
+                   lambda: {(("model", r["name"]),): int(r["state"] == "ready") for r in get_status()})
+    register_gauge("therapybot_model_load_seconds", "Time taken to load each model",
+                   lambda: {(("model", r["name"]),): r["load_seconds"] for r in get_status()})
+    mount_metrics(demo.app)
+start_warm_up()
+print(startup_report())
+demo.block_thread()
\ No newline at end of file
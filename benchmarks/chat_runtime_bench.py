@@ -0,0 +1,88 @@
+import argparse
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+
+# Compares the fp32 and int8 therapy chat runtimes on latency, peak memory and
+# agreement of the generated replies. Each runtime runs in its own process so
+# peak RSS is measured independently.
+#   python -m benchmarks.chat_runtime_bench --runs 3
+
+MODEL_ID = "facebook/blenderbot-1B-distill"
+
+PROMPTS = [
+    "I have been feeling really anxious about work lately.",
+    "I can't sleep at night and I feel tired all day.",
+    "My friends don't seem to understand me anymore.",
+    "How can I stop overthinking everything?",
+    "I feel sad for no reason and I don't know why.",
+    "I had a panic attack yesterday and it scared me.",
+]
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _run_runtime(runtime, runs, max_new_tokens, results):
+    import torch
+    from components.chat_runtime import load_chat_model
+
+    start = time.perf_counter()
+    tokenizer, model = load_chat_model(MODEL_ID, runtime=runtime)
+    load_seconds = time.perf_counter() - start
+
+    latencies, replies = [], []
+    for run in range(runs):
+        for prompt in PROMPTS:
+            inputs = tokenizer([prompt], return_tensors="pt")
+            start = time.perf_counter()
+            with torch.inference_mode():
+                reply_ids = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False)
+            latencies.append(time.perf_counter() - start)
+            if run == 0:
+                replies.append(tokenizer.decode(reply_ids[0], skip_special_tokens=True))
+
+    results[runtime] = {
+        "load_seconds": load_seconds,
+        "latency_p50_ms": statistics.median(latencies) * 1000.0,
+        "latency_mean_ms": statistics.fmean(latencies) * 1000.0,
+        "latency_max_ms": max(latencies) * 1000.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "replies": replies,
+    }
+
+def _token_overlap(a, b):
+    a, b = set(a.lower().split()), set(b.lower().split())
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fp32 vs int8 BlenderBot runtimes on CPU")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=80)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Manager().dict()
+    for runtime in ("fp32", "int8"):
+        proc = ctx.Process(target=_run_runtime, args=(runtime, args.runs, args.max_new_tokens, results))
+        proc.start()
+        proc.join()
+
+    fp32, int8 = results["fp32"], results["int8"]
+    pairs = list(zip(fp32["replies"], int8["replies"]))
+    report = {
+        "model_id": MODEL_ID,
+        "prompts": len(PROMPTS),
+        "runs": args.runs,
+        "fp32": {k: v for k, v in fp32.items() if k != "replies"},
+        "int8": {k: v for k, v in int8.items() if k != "replies"},
+        "speedup_p50": fp32["latency_p50_ms"] / int8["latency_p50_ms"],
+        "exact_match_rate": sum(a == b for a, b in pairs) / len(pairs),
+        "mean_token_overlap": statistics.fmean(_token_overlap(a, b) for a, b in pairs),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+# End-to-end latency/throughput of the tab handlers, called directly (no browser).
+# Google Vision is replaced by the GCV stub and Gemini by the fake LLM server, so
+# the run is offline and repeatable; the chat, symptom and FAQ models are real.
+# Each tab runs in its own process so peak RSS and model-load times are independent.
+#   python -m benchmarks.e2e_bench --tabs symptom faq --concurrency 1 4 16 --requests 200
+#   python -m benchmarks.e2e_bench --workload recorded.jsonl --output release.json
+#
+# A recorded workload is JSON lines: {"tab": "faq", "input": "How do I book?"}.
+# Chat lines may carry "user" (turns of one user share a session), ocr/report lines
+# point "input" at an image/report file and may set "mode" or "language".
+#
+# The symptom and FAQ workloads repeat queries, so each of their concurrency levels is
+# reported twice: "uncached" with the query cache bypassed (every request runs the
+# retriever and, off the fast path, the encoder) and "cached" starting from an empty cache.
+
+TABS = ("chat", "symptom", "faq", "ocr", "report")
+QUERY_CACHED_TABS = ("symptom", "faq")
+
+SYMPTOMS = [
+    "fever", "headache", "dry cough", "sore throat", "runny nose", "chest pain",
+    "shortness of breath", "nausea", "vomiting", "diarrhea", "joint pain", "fatigue",
+    "skin rash", "dizziness", "blurred vision", "back pain", "itching", "chills",
+]
+
+FAQ_QUESTIONS = [
+    "How do I book an appointment?",
+    "What are your clinic timings?",
+    "Can I cancel my appointment?",
+    "Do you accept health insurance?",
+    "How can I get my lab report?",
+    "Is online consultation available?",
+    "What should I bring to my first visit?",
+    "How do I reset my password?",
+    "Where is the clinic located?",
+    "How long does it take to get test results?",
+]
+
+CHAT_PROMPTS = [
+    "I have been feeling really anxious about work lately.",
+    "I can't sleep at night and I feel tired all day.",
+    "My friends don't seem to understand me anymore.",
+    "How can I stop overthinking everything?",
+    "I feel sad for no reason and I don't know why.",
+    "I had a panic attack yesterday and it scared me.",
+]
+
+LAB_LINES = [
+    ("Hemoglobin", 9.0, 18.0, "g/dL"),
+    ("Glucose", 60.0, 180.0, "mg/dL"),
+    ("Cholesterol", 120.0, 280.0, "mg/dL"),
+    ("Creatinine", 0.4, 2.0, "mg/dL"),
+    ("TSH", 0.2, 8.0, "mIU/L"),
+]
+
+def _percentile(values, q):
+    # Nearest-rank percentile of a sorted list
+    return values[max(0, math.ceil(q / 100.0 * len(values)) - 1)]
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+# --- Workloads: a task is a list of requests run in order (one chat conversation,
+# or a single request for the stateless tabs)
+
+def _synthetic_report_text(rng):
+    return "\n".join(f"{term} {rng.uniform(low, high):.1f} {unit}" for term, low, high, unit in LAB_LINES)
+
+def _synthetic_tasks(tab, count, chat_turns, workdir, rng):
+    if tab == "chat":
+        return [
+            [{"input": rng.choice(CHAT_PROMPTS)} for _ in range(chat_turns)]
+            for _ in range(max(1, count // chat_turns))
+        ]
+    if tab == "symptom":
+        return [[{"input": f"I have {rng.choice(SYMPTOMS)} and {rng.choice(SYMPTOMS)}"}] for _ in range(count)]
+    if tab == "faq":
+        return [[{"input": rng.choice(FAQ_QUESTIONS)}] for _ in range(count)]
+    if tab == "ocr":
+        from PIL import Image, ImageDraw
+        tasks = []
+        for i in range(count):
+            # Distinct pixels per request, so OCR results are not served from the cache
+            image = Image.new("RGB", (1200, 900), "white")
+            ImageDraw.Draw(image).multiline_text((60, 60), _synthetic_report_text(rng), fill="black")
+            image.putpixel((i % 1200, i // 1200 % 900), (0, 0, 0))
+            tasks.append([{"input": image, "mode": "🧠 AI (Gemini)"}])
+        return tasks
+    if tab == "report":
+        import fitz
+        tasks = []
+        for i in range(count):
+            # Text-layer PDFs with different values, so summaries are not cache hits either
+            path = os.path.join(workdir, f"report_{i}.pdf")
+            with fitz.open() as doc:
+                doc.new_page().insert_text((72, 72), _synthetic_report_text(rng))
+                doc.save(path)
+            tasks.append([{"input": path, "language": "English"}])
+        return tasks
+    raise ValueError(f"unknown tab: {tab}")
+
+def _recorded_tasks(tab, path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records = [r for r in records if r.get("tab") == tab]
+    if tab != "chat":
+        return [[r] for r in records]
+    conversations = {}
+    for i, record in enumerate(records):
+        conversations.setdefault(record.get("user", i), []).append(record)
+    return list(conversations.values())
+
+# --- Handlers: each runs one request to completion (consuming generators) and
+# returns the state to pass to the next request of the same task
+
+def _consume(outputs, on_first):
+    last = None
+    for last in outputs:
+        on_first()
+    return last
+
+def _handler(tab):
+    if tab == "chat":
+        from tabs.therapy_chat import respond
+
+        def run_chat(request, session, on_first):
+            return _consume(respond(request["input"], session), on_first)[2]
+        return run_chat
+    if tab in ("symptom", "faq"):
+        if tab == "symptom":
+            from tabs.symptom_checker import identify_disease as handle
+        else:
+            from tabs.faq_assistant import answer_faq as handle
+
+        def run_query(request, state, on_first):
+            handle(request["input"])
+            on_first()
+        return run_query
+    if tab == "ocr":
+        from PIL import Image
+        from tabs.image_ocr_llm import SUMMARY_MODES, process_image_with_summary
+
+        def run_ocr(request, state, on_first):
+            image = request["input"]
+            if isinstance(image, str):
+                image = Image.open(image)
+            _consume(process_image_with_summary(image, request.get("mode", SUMMARY_MODES[0])), on_first)
+        return run_ocr
+    if tab == "report":
+        from tabs.report_analyzer import ocr_and_explain
+
+        def run_report(request, state, on_first):
+            _consume(ocr_and_explain(SimpleNamespace(name=request["input"]), request.get("language", "English")), on_first)
+        return run_report
+    raise ValueError(f"unknown tab: {tab}")
+
+def _query_cache(tab):
+    if tab == "symptom":
+        from tabs.symptom_checker import symptom_cache as cache
+    else:
+        from tabs.faq_assistant import faq_cache as cache
+    return cache
+
+def _run_tasks(handler, tasks, concurrency):
+    latencies, first_output, errors = [], [], []
+    lock = threading.Lock()
+
+    def run_task(task):
+        state = None
+        for request in task:
+            start = time.perf_counter()
+            first = []
+            try:
+                state = handler(request, state, lambda: first or first.append(time.perf_counter() - start))
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if first:
+                    first_output.append(first[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run_task, tasks))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    first_output.sort()
+    stats = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+    }
+    if latencies:
+        stats.update({
+            "latency_p50_ms": _percentile(latencies, 50) * 1000.0,
+            "latency_p95_ms": _percentile(latencies, 95) * 1000.0,
+            "latency_p99_ms": _percentile(latencies, 99) * 1000.0,
+            "latency_mean_ms": statistics.fmean(latencies) * 1000.0,
+            "first_output_p50_ms": _percentile(first_output, 50) * 1000.0,
+            "first_output_p95_ms": _percentile(first_output, 95) * 1000.0,
+        })
+    if errors:
+        stats["first_error"] = errors[0]
+    return stats
+
+def _run_tab(tab, config, results):
+    workdir = tempfile.mkdtemp(prefix=f"bench_{tab}_")
+    # A fresh result cache per tab, so every run starts cold
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(workdir, "results.sqlite3")
+    os.environ["WARMUP"] = "0"
+
+    from components.model_registry import get_status
+    from components.result_cache import get_result_cache
+
+    rng = random.Random(config["seed"])
+    handler = _handler(tab)
+    report = {"concurrency": {}}
+
+    # The first request loads the models this tab needs; it is timed on its own
+    if config["workload"]:
+        tasks = _recorded_tasks(tab, config["workload"])
+    else:
+        tasks = _synthetic_tasks(tab, 1, 1, workdir, rng)
+    if not tasks:
+        results[tab] = {"skipped": "no requests for this tab in the workload"}
+        return
+    report["cold_start"] = _run_tasks(handler, [tasks[0][:1]], 1)
+
+    for concurrency in config["concurrency"]:
+        if not config["workload"]:
+            tasks = _synthetic_tasks(tab, config["requests"], config["chat_turns"], workdir, rng)
+        if tab not in QUERY_CACHED_TABS:
+            report["concurrency"][str(concurrency)] = _run_tasks(handler, tasks, concurrency)
+            continue
+        cache, stats = _query_cache(tab), {}
+        for mode in ("uncached", "cached"):
+            cache.clear()
+            cache.enabled = mode == "cached"
+            stats[mode] = _run_tasks(handler, tasks, concurrency)
+        cache.enabled = True
+        report["concurrency"][str(concurrency)] = stats
+
+    report["model_load_seconds"] = {r["name"]: r["load_seconds"] for r in get_status() if r["load_seconds"] is not None}
+    report["peak_rss_mb"] = _peak_rss_mb()
+    if tab in ("ocr", "report"):
+        report["result_cache"] = get_result_cache().get_stats()
+    if tab in QUERY_CACHED_TABS:
+        report["query_cache"] = _query_cache(tab).get_stats()
+        # Share of queries answered by the lexical fast path without encoding
+        from components.model_registry import get_resource
+        retriever = get_resource(f"{tab}_index")[2]
+        report["retrieval"] = retriever.get_stats() if retriever is not None else None
+    results[tab] = report
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the TherapyBot++ tab handlers")
+    parser.add_argument("--tabs", nargs="+", choices=TABS, default=list(TABS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--requests", type=int, default=50, help="Synthetic requests per concurrency level")
+    parser.add_argument("--chat-turns", type=int, default=3, help="Turns per synthetic chat conversation")
+    parser.add_argument("--workload", help="Recorded workload (JSON lines) instead of synthetic requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-chunk-ms", type=float, default=30.0)
+    parser.add_argument("--gcv-latency-ms", type=float, default=400.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    # Local stand-ins for the external APIs; spawned tab processes inherit this environment
+    from components.fake_llm_server import serve
+    server = serve(0, args.llm_chunk_ms, args.llm_first_token_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update({
+        "GCV_BACKEND": "stub",
+        "GCV_STUB_LATENCY_MS": str(args.gcv_latency_ms),
+        "LLM_BACKEND": "http",
+        "LLM_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+    })
+
+    config = {
+        "requests": args.requests,
+        "chat_turns": args.chat_turns,
+        "concurrency": args.concurrency,
+        "workload": args.workload,
+        "seed": args.seed,
+    }
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Manager().dict()
+    for tab in args.tabs:
+        proc = ctx.Process(target=_run_tab, args=(tab, config, results))
+        proc.start()
+        proc.join()
+        if tab not in results:
+            results[tab] = {"failed": f"benchmark process exited with code {proc.exitcode}"}
+    server.shutdown()
+
+    report = {
+        "config": dict(config, llm_first_token_ms=args.llm_first_token_ms, llm_chunk_ms=args.llm_chunk_ms,
+                       gcv_latency_ms=args.gcv_latency_ms),
+        "tabs": {tab: results[tab] for tab in args.tabs},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import difflib
+import json
+import os
+import statistics
+import time
+from PIL import Image
+
+# Compares the legacy and adaptive Tesseract preprocessing pipelines on sample
+# report images: preprocessing time, OCR time, and accuracy. Put the expected text
+# for scan.jpg in scan.txt next to it to get a character similarity score; lab-value
+# recall is measured against the values found in that text.
+#   python -m benchmarks.ocr_preprocess_bench samples/ --runs 2
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+
+def _variants():
+    from components.image_preprocess import adaptive_preprocess, legacy_preprocess
+    return {
+        "legacy": legacy_preprocess,
+        "adaptive": lambda image: adaptive_preprocess(image),
+        "adaptive+deskew": lambda image: adaptive_preprocess(image, deskew=True),
+        "adaptive+binarize": lambda image: adaptive_preprocess(image, binarize_output=True),
+    }
+
+def _sample_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(path, name)
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            yield path
+
+def _lab_keys(text):
+    from components.lab_extraction import extract_lab_values
+    return {(v["term"], v["value"]) for v in extract_lab_values(text)}
+
+def _bench_variant(preprocess, samples, runs):
+    import pytesseract
+
+    prep_times, ocr_times, similarities, recalls = [], [], [], []
+    for path, truth in samples:
+        for run in range(runs):
+            with Image.open(path) as image:
+                image.load()
+                start = time.perf_counter()
+                prepared = preprocess(image)
+                prep_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            text = pytesseract.image_to_string(prepared, lang='eng', config='--psm 6')
+            ocr_times.append(time.perf_counter() - start)
+
+            if run == 0 and truth is not None:
+                similarities.append(difflib.SequenceMatcher(None, " ".join(truth.split()), " ".join(text.split())).ratio())
+                expected = _lab_keys(truth)
+                if expected:
+                    recalls.append(len(expected & _lab_keys(text)) / len(expected))
+
+    return {
+        "preprocess_p50_ms": statistics.median(prep_times) * 1000.0,
+        "ocr_p50_ms": statistics.median(ocr_times) * 1000.0,
+        "total_mean_ms": (statistics.fmean(prep_times) + statistics.fmean(ocr_times)) * 1000.0,
+        "char_similarity": statistics.fmean(similarities) if similarities else None,
+        "lab_value_recall": statistics.fmean(recalls) if recalls else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing pipelines on sample reports")
+    parser.add_argument("paths", nargs="+", help="Image files or directories (optional ground truth in <name>.txt)")
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--variants", nargs="*", help="Subset of pipelines to run (default: all)")
+    args = parser.parse_args()
+
+    samples = []
+    for path in _sample_paths(args.paths):
+        truth_path = os.path.splitext(path)[0] + ".txt"
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding="utf-8") as f:
+                truth = f.read()
+        samples.append((path, truth))
+    if not samples:
+        parser.error("no sample images found")
+
+    variants = _variants()
+    names = args.variants or list(variants)
+    report = {
+        "samples": len(samples),
+        "with_ground_truth": sum(truth is not None for _, truth in samples),
+        "runs": args.runs,
+    }
+    for name in names:
+        report[name] = _bench_variant(variants[name], samples, args.runs)
+
+    legacy = report.get("legacy")
+    if legacy:
+        for name in names:
+            if name != "legacy":
+                report[name]["speedup_vs_legacy"] = legacy["total_mean_ms"] / report[name]["total_mean_ms"]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+
+# BlenderBot-1B-distill has 128 position embeddings; leave room for </s>
+CHAT_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "120"))
+
+# BlenderBot's conversation format: user turns get a leading space, turns joined by two spaces
+TURN_JOIN = "  "
+
+class ContextBuilder:
+    # Builds model input ids from recent turns under a token budget. Turn token ids are
+    # cached on the ChatSession, so each call only tokenizes the new message.
+    def __init__(self, tokenizer, max_tokens=None):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens or CHAT_CONTEXT_MAX_TOKENS
+        self.separator_ids = tokenizer(TURN_JOIN, add_special_tokens=False).input_ids
+        self.eos_ids = [tokenizer.eos_token_id]
+
+    def encode_utterance(self, text, from_user):
+        text = " " + text if from_user else text
+        return self.tokenizer(text, add_special_tokens=False).input_ids
+
+    def build(self, session, user_ids):
+        # Newest message first (left-truncated if it alone exceeds the budget),
+        # then earlier utterances until the next one would not fit
+        budget = max(self.max_tokens - len(self.eos_ids), 0)
+        # Explicit start index: user_ids[-0:] would be the whole message
+        pieces = [user_ids[max(len(user_ids) - budget, 0):]]
+        used = len(pieces[0])
+
+        for past_user_ids, past_reply_ids in reversed(session.turn_tokens):
+            fits = True
+            for ids in (past_reply_ids, past_user_ids):
+                cost = len(ids) + len(self.separator_ids)
+                if used + cost > budget:
+                    fits = False
+                    break
+                pieces.append(ids)
+                used += cost
+            if not fits:
+                break
+
+        input_ids = []
+        for i, ids in enumerate(reversed(pieces)):
+            if i:
+                input_ids += self.separator_ids
+            input_ids += ids
+        return input_ids + self.eos_ids
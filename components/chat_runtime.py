@@ -0,0 +1,40 @@
+import os
+import torch
+from transformers import BlenderbotTokenizer, BlenderbotForConditionalGeneration
+
+# CPU runtime options for the therapy chat model:
+# CHAT_RUNTIME=fp32 (default) or int8 (dynamic quantization of nn.Linear layers)
+# CHAT_INTRA_OP_THREADS / CHAT_INTER_OP_THREADS override torch's thread pools
+CHAT_RUNTIME = os.getenv("CHAT_RUNTIME", "fp32")
+
+def configure_threads(intra_op=None, inter_op=None):
+    intra_op = intra_op or os.getenv("CHAT_INTRA_OP_THREADS")
+    inter_op = inter_op or os.getenv("CHAT_INTER_OP_THREADS")
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        # Only allowed before torch starts any inter-op parallel work
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError:
+            pass
+
+def quantize_int8(model):
+    # Linear layers dominate BlenderBot's CPU time; weights become int8, activations stay fp32
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_chat_model(model_id, runtime=None):
+    runtime = runtime or CHAT_RUNTIME
+    if runtime not in ("fp32", "int8"):
+        raise ValueError(f"Unknown CHAT_RUNTIME: {runtime}")
+
+    configure_threads()
+    tokenizer = BlenderbotTokenizer.from_pretrained(model_id)
+    model = BlenderbotForConditionalGeneration.from_pretrained(model_id)
+    model.eval()
+    # Reuse the decoder's key/value cache across generation steps
+    model.generation_config.use_cache = True
+
+    if runtime == "int8":
+        model = quantize_int8(model)
+    return tokenizer, model
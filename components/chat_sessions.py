@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+TURN_SEPARATOR = "\n\n"
+
+def format_turn(user_message, reply):
+    return f"👤 You: {user_message}\n\n🤖 Bot: {reply}\n\n------"
+
+class ChatSession:
+    # One user's chat: bounded turn history plus an incrementally built transcript
+    def __init__(self, max_turns=50):
+        self.session_id = uuid.uuid4().hex
+        self.max_turns = max_turns
+        self.history = deque()
+        # Cached (user_ids, reply_ids) per turn, used by ContextBuilder
+        self.turn_tokens = deque()
+        self.transcript = ""
+        self._turn_lengths = deque()
+        self.last_used = time.monotonic()
+        # Requests currently using this session (never evicted while > 0), and whether
+        # its history was dropped by eviction since the user's last message
+        self.in_use = 0
+        self.evicted = False
+
+    def add_turn(self, user_message, reply, tokens=None):
+        # Append only the new turn; drop the oldest turn's prefix once over the cap
+        turn = format_turn(user_message, reply)
+        self.history.append((user_message, reply))
+        self.turn_tokens.append(tokens or ([], []))
+        self._turn_lengths.append(len(turn))
+        self.transcript = turn if not self.transcript else self.transcript + TURN_SEPARATOR + turn
+
+        while len(self.history) > self.max_turns:
+            self.history.popleft()
+            self.turn_tokens.popleft()
+            dropped = self._turn_lengths.popleft()
+            self.transcript = self.transcript[dropped + len(TURN_SEPARATOR):]
+        return self.transcript
+
+    def preview(self, user_message, partial_reply):
+        # Transcript with an in-progress turn appended, without recording it
+        turn = format_turn(user_message, partial_reply)
+        return turn if not self.transcript else self.transcript + TURN_SEPARATOR + turn
+
+    def clear(self):
+        self.history.clear()
+        self.turn_tokens.clear()
+        self._turn_lengths.clear()
+        self.transcript = ""
+
+    def size_chars(self):
+        # Transcript dominates memory; history holds the same text once more,
+        # and each cached token id costs about as much as a few characters
+        return 2 * len(self.transcript) + 4 * sum(len(u) + len(r) for u, r in self.turn_tokens)
+
+class SessionRegistry:
+    # Tracks live chat sessions so idle ones can be evicted and total memory capped
+    def __init__(self, max_turns=None, idle_seconds=None, max_total_chars=None):
+        self.max_turns = max_turns or int(os.getenv("CHAT_HISTORY_MAX_TURNS", "50"))
+        self.idle_seconds = idle_seconds or float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+        self.max_total_chars = max_total_chars or int(os.getenv("CHAT_MEMORY_MAX_CHARS", "5000000"))
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session):
+        # Returns a live session for this Gradio state value, creating one if needed,
+        # and marks it in use until done() is called
+        if session is None:
+            session = ChatSession(self.max_turns)
+        with self._lock:
+            session.last_used = time.monotonic()
+            session.in_use += 1
+            self._sessions[session.session_id] = session
+        return session
+
+    def done(self, session):
+        with self._lock:
+            session.in_use -= 1
+            session.last_used = time.monotonic()
+
+    def release(self, session):
+        if session is not None:
+            session.clear()
+            with self._lock:
+                self._sessions.pop(session.session_id, None)
+
+    def enforce_limits(self):
+        # Evict idle sessions, then least recently used ones while over the memory ceiling.
+        # Sessions with a request in flight are skipped; an evicted session is cleared
+        # (its Gradio state still references it) and flagged so the user can be told.
+        now = time.monotonic()
+        with self._lock:
+            by_age = sorted(self._sessions.values(), key=lambda s: s.last_used)
+            total = sum(s.size_chars() for s in by_age)
+            for session in by_age:
+                idle = now - session.last_used > self.idle_seconds
+                if not idle and total <= self.max_total_chars:
+                    break
+                if session.in_use:
+                    continue
+                total -= session.size_chars()
+                session.clear()
+                session.evicted = True
+                del self._sessions[session.session_id]
+                self.evictions += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_chars": sum(s.size_chars() for s in self._sessions.values()),
+                "max_total_chars": self.max_total_chars,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,121 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+from components.embeddings import EMBEDDING_MODEL_NAME
+from components.vector_index import normalize_rows, to_numpy
+
+# On-disk layout: <prefix>.npy holds the embedding matrix (memory-mapped on load,
+# so worker processes share pages through the OS page cache) and <prefix>.meta.json
+# holds everything else: row metadata, model name, dimension and checksum.
+STORE_FORMAT_VERSION = 1
+
+def _paths(prefix):
+    return f"{prefix}.npy", f"{prefix}.meta.json"
+
+def _file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _to_list(value):
+    return value.tolist() if hasattr(value, "tolist") else list(value)
+
+def _temp_file(path, mode, temps, **kwargs):
+    # Temp file next to `path` (same filesystem, so os.replace is atomic); its name is
+    # appended to `temps` for the caller to rename or clean up
+    f = tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False, **kwargs)
+    temps.append(f.name)
+    # mkstemp creates files as 0600; stores are read by other processes and users
+    os.chmod(f.name, 0o644)
+    return f
+
+def save_store(prefix, embeddings, metadata, model_name=EMBEDDING_MODEL_NAME, dtype="float32"):
+    # Rows are stored L2-normalized so the index can use the mapped matrix as-is
+    matrix = normalize_rows(embeddings).astype(dtype)
+    npy_path, meta_path = _paths(prefix)
+
+    # Write to uniquely named temp files and rename, so readers never see a half-written
+    # store and concurrent builds never write into each other's temp files
+    temps = []
+    try:
+        with _temp_file(npy_path, "wb", temps) as f:
+            np.save(f, matrix)
+        meta = {
+            "format_version": STORE_FORMAT_VERSION,
+            "model_name": model_name,
+            "dimension": int(matrix.shape[1]),
+            "count": int(matrix.shape[0]),
+            "dtype": str(matrix.dtype),
+            "normalized": True,
+            "checksum": _file_checksum(temps[0]),
+            "fields": {key: _to_list(value) for key, value in metadata.items()},
+        }
+        with _temp_file(meta_path, "w", temps, encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temps[0], npy_path)
+        os.replace(temps[1], meta_path)
+    except BaseException:
+        for path in temps:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return meta
+
+def convert_pickle(pkl_path, prefix=None, dtype="float32", model_name=EMBEDDING_MODEL_NAME):
+    # Convert a legacy {'embeddings': ..., <field>: [...]} pickle into the store format
+    with open(pkl_path, "rb") as f:
+        data = pickle.load(f)
+    prefix = prefix or os.path.splitext(pkl_path)[0]
+    metadata = {key: value for key, value in data.items() if key != "embeddings"}
+    return save_store(prefix, to_numpy(data["embeddings"]), metadata, model_name=model_name, dtype=dtype)
+
+def load_store(prefix, verify=None, expected_model=None):
+    # Returns a dict shaped like the legacy pickle: 'embeddings' plus the metadata fields
+    npy_path, meta_path = _paths(prefix)
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding store version {meta.get('format_version')} in {meta_path}")
+    if expected_model and meta["model_name"] != expected_model:
+        raise ValueError(f"{prefix} was built with {meta['model_name']}, expected {expected_model}")
+
+    # Full checksum reads the whole file, so it is opt-in rather than done on every startup
+    if verify is None:
+        verify = os.getenv("EMBED_STORE_VERIFY", "0") == "1"
+    if verify and _file_checksum(npy_path) != meta["checksum"]:
+        raise ValueError(f"Checksum mismatch for {npy_path}")
+
+    embeddings = np.load(npy_path, mmap_mode="r")
+    if embeddings.shape != (meta["count"], meta["dimension"]):
+        raise ValueError(f"{npy_path} has shape {embeddings.shape}, metadata says ({meta['count']}, {meta['dimension']})")
+
+    data = dict(meta["fields"])
+    data["embeddings"] = embeddings
+    data["normalized"] = meta["normalized"]
+    data["model_name"] = meta["model_name"]
+    return data
+
+def load_embeddings(prefix):
+    # Load <prefix>.npy/.meta.json, converting <prefix>.pkl on first use if needed
+    npy_path, meta_path = _paths(prefix)
+    if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+        convert_pickle(f"{prefix}.pkl", prefix)
+    return load_store(prefix, expected_model=EMBEDDING_MODEL_NAME)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert embedding pickles into memory-mapped stores")
+    parser.add_argument("pickles", nargs="+", help="e.g. models/faq_embeddings.pkl")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    args = parser.parse_args()
+
+    for path in args.pickles:
+        meta = convert_pickle(path, dtype=args.dtype)
+        print(f"✅ {path}: {meta['count']} x {meta['dimension']} {meta['dtype']} ({meta['model_name']})")
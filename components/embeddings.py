@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from components.metrics import record_stage
+from components.micro_batcher import MicroBatcher
+from components.model_registry import get_resource, get_status, register
+
+# Shared sentence-embedding model used by the Symptom Checker and FAQ tabs
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Per-call encode latency, read by get_embedding_stats()
+_stats = {
+    "model_name": EMBEDDING_MODEL_NAME,
+    "encode_calls": 0,
+    "encoded_texts": 0,
+    "encode_seconds_total": 0.0,
+    "last_encode_seconds": None,
+}
+_stats_lock = threading.Lock()
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+register("embedding_model", _load_embedding_model, priority=20, label=f"Embeddings ({EMBEDDING_MODEL_NAME})")
+
+def get_embedding_model():
+    # Loaded once per process on first use (or by warm-up); later callers reuse it
+    return get_resource("embedding_model")
+
+def encode_many(texts, batch_size=64, convert_to_tensor=True):
+    # Encode a list of texts in one batched call
+    texts = list(texts)
+    model = get_embedding_model()
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_tensor=convert_to_tensor)
+    elapsed = time.perf_counter() - start
+    record_stage("embed.encode", elapsed, start)
+
+    with _stats_lock:
+        _stats["encode_calls"] += 1
+        _stats["encoded_texts"] += len(texts)
+        _stats["encode_seconds_total"] += elapsed
+        _stats["last_encode_seconds"] = elapsed
+    return embeddings
+
+def encode(text, convert_to_tensor=True):
+    # Encode a single text; returns a 1-D embedding
+    return encode_many([text], convert_to_tensor=convert_to_tensor)[0]
+
+# Concurrent single-query requests are coalesced into one forward pass.
+# Tabs also use this as their Gradio concurrency_limit so enough requests reach the queue.
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+
+_query_batcher = MicroBatcher(
+    lambda texts: list(encode_many(texts, convert_to_tensor=False)),
+    max_batch_size=EMBED_BATCH_MAX_SIZE,
+    max_wait_ms=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5")),
+    name="embedding-batcher",
+)
+
+def encode_query(text):
+    # Encode one user query through the shared micro-batching queue (NumPy vector)
+    return _query_batcher(text)
+
+def get_embedding_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    calls = stats["encode_calls"]
+    stats["avg_encode_seconds"] = stats["encode_seconds_total"] / calls if calls else None
+    stats["load_seconds"] = next(r["load_seconds"] for r in get_status() if r["name"] == "embedding_model")
+    stats["batcher"] = _query_batcher.get_stats()
+    return stats
@@ -0,0 +1,66 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for Gemini, speaking the protocol of llm_client's http backend:
+#   python -m components.fake_llm_server --port 8009 --chunk-ms 40 --fail-rate 0.1
+#   LLM_BACKEND=http LLM_BASE_URL=http://127.0.0.1:8009 python app.py
+
+FAKE_SUMMARY = """**Summary**: This is a locally generated test summary. Most values appear to be within normal ranges.
+
+**Key Findings**:
+- The report text was received and processed by the fake LLM server.
+
+**Abnormal Values**:
+- None flagged by the fake server.
+
+**Health Recommendations**:
+- Please consult a doctor to interpret your results."""
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    chunk_seconds = 0.0
+    first_token_seconds = 0.0
+    fail_rate = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if random.random() < self.fail_rate:
+            self.send_error(503, "UNAVAILABLE: injected failure")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        time.sleep(self.first_token_seconds)
+
+        words = FAKE_SUMMARY.split(" ")
+        prompt_chars = len(body.get("prompt", ""))
+        for i in range(0, len(words), 4):
+            chunk = " ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "")
+            self.wfile.write((json.dumps({"text": chunk, "prompt_chars": prompt_chars}) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.chunk_seconds)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port=8009, chunk_ms=0.0, first_token_ms=0.0, fail_rate=0.0):
+    FakeLLMHandler.chunk_seconds = chunk_ms / 1000.0
+    FakeLLMHandler.first_token_seconds = first_token_ms / 1000.0
+    FakeLLMHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake streaming LLM server for local testing")
+    parser.add_argument("--port", type=int, default=8009)
+    parser.add_argument("--chunk-ms", type=float, default=30.0, help="Delay between streamed chunks")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Delay before the first chunk")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    print(f"🧪 Fake LLM server on http://127.0.0.1:{args.port}/generate")
+    serve(args.port, args.chunk_ms, args.first_token_ms, args.fail_rate).serve_forever()
@@ -0,0 +1,140 @@
+import os
+import threading
+import numpy as np
+from components.metrics import increment, timed
+from components.query_cache import normalize_query
+from components.vector_index import _top_k, normalize_rows, to_numpy
+
+# Lexical + dense retrieval for the FAQ and symptom corpora. A BM25 inverted index
+# built at load time answers exact and near-exact matches (e.g. the example questions
+# shown in the UI) without running the embedding model; other queries are encoded
+# and ranked by a weighted mix of cosine similarity and normalized BM25.
+# Either way the reported scores are cosine similarities, so the tabs' cosine-tuned
+# low-confidence thresholds (SYMPTOM_MIN_SCORE, FAQ_MIN_SCORE) still apply.
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.8"))
+# Token-set overlap (Jaccard) with the best lexical match needed to skip the encoder
+HYBRID_FAST_PATH_MIN_OVERLAP = float(os.getenv("HYBRID_FAST_PATH_MIN_OVERLAP", "0.9"))
+# Candidates taken from each side before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+
+def tokenize(text):
+    return normalize_query(text).split()
+
+class BM25Index:
+    # Inverted index with per-posting BM25 weights precomputed, so a query is a
+    # scatter-add over the postings of its terms
+    def __init__(self, texts, k1=1.5, b=0.75):
+        docs = [tokenize(t) for t in texts]
+        self.n_docs = len(docs)
+        self.token_sets = [frozenset(d) for d in docs]
+        lengths = np.array([len(d) for d in docs], dtype=np.float32)
+        avg_length = float(lengths.mean()) if self.n_docs and lengths.mean() > 0 else 1.0
+
+        postings = {}
+        for row, doc in enumerate(docs):
+            counts = {}
+            for token in doc:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((row, tf))
+
+        self.postings = {}
+        self.max_weight = {}
+        for token, entries in postings.items():
+            rows = np.array([r for r, _ in entries], dtype=np.int64)
+            tf = np.array([t for _, t in entries], dtype=np.float32)
+            idf = np.log(1.0 + (self.n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            weights = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[rows] / avg_length))
+            self.postings[token] = (rows, weights.astype(np.float32))
+            self.max_weight[token] = float(weights.max())
+
+        # Normalized text -> first row, for the exact-match fast path
+        self.exact = {}
+        for row, text in enumerate(texts):
+            self.exact.setdefault(normalize_query(text), row)
+
+    def scores(self, tokens):
+        # BM25 scores scaled to [0, 1] by the best score attainable for these tokens
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        tokens = [t for t in dict.fromkeys(tokens) if t in self.postings]
+        for token in tokens:
+            rows, weights = self.postings[token]
+            scores[rows] += weights
+        ceiling = sum(self.max_weight[t] for t in tokens)
+        return scores / ceiling if ceiling else scores
+
+class HybridRetriever:
+    def __init__(self, texts, dense_index, dense_weight=HYBRID_DENSE_WEIGHT,
+                 min_overlap=HYBRID_FAST_PATH_MIN_OVERLAP, candidates=HYBRID_CANDIDATES, name="corpus"):
+        self.lexical = BM25Index(texts)
+        self.dense_index = dense_index
+        self.dense_weight = dense_weight
+        self.min_overlap = min_overlap
+        self.candidates = candidates
+        self.name = name
+        self._stats = {"fast_path": 0, "hybrid": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, path):
+        with self._stats_lock:
+            self._stats[path] += 1
+        increment("therapybot_retrieval_total", corpus=self.name, path=path)
+
+    def fast_path(self, query, k=5):
+        # (row, cosine) pairs for an exact or near-exact match, else None (caller encodes)
+        with timed("search.lexical"):
+            tokens = tokenize(query)
+            if not tokens:
+                return None
+            scores = self.lexical.scores(tokens)
+            top_scores, top_rows = _top_k(scores[None, :], k)
+            best = self.lexical.exact.get(normalize_query(query))
+            if best is None:
+                if not top_rows.size or top_scores[0, 0] <= 0:
+                    return None
+                best = int(top_rows[0, 0])
+                query_set, doc_set = set(tokens), self.lexical.token_sets[best]
+                overlap = len(query_set & doc_set) / len(query_set | doc_set)
+                if overlap < self.min_overlap:
+                    return None
+
+        self._count("fast_path")
+        # Lexically closest other rows stand in for the alternatives, scored by cosine
+        # against the matched row's stored vector (the query is near-identical to it)
+        rows = [best] + [int(r) for r, s in zip(top_rows[0], top_scores[0]) if r != best and s > 0]
+        rows = rows[:k]
+        vectors = to_numpy(self.dense_index.vectors[rows])
+        cosine = vectors @ vectors[0]
+        alternatives = sorted(zip(rows[1:], cosine[1:].tolist()), key=lambda match: -match[1])
+        return [(best, 1.0)] + alternatives
+
+    def search(self, query, embedding, k=5):
+        # Fused ranking over the union of the dense and lexical candidate sets
+        self._count("hybrid")
+        with timed("search.hybrid"):
+            query_vector = normalize_rows(embedding)
+            n = max(k, self.candidates)
+            dense_rows = self.dense_index.search(query_vector, n)[1][0]
+            lexical = self.lexical.scores(tokenize(query))
+            lexical_rows = _top_k(lexical[None, :], n)[1][0]
+
+            rows = np.unique(np.concatenate([dense_rows[dense_rows >= 0], lexical_rows]))
+            dense = to_numpy(self.dense_index.vectors[rows]) @ query_vector[0]
+            fused = self.dense_weight * dense + (1.0 - self.dense_weight) * lexical[rows]
+            order = _top_k(fused[None, :], k)[1][0]
+        # Ranked by the fused score, reported with each row's cosine similarity
+        return [(int(rows[i]), float(dense[i])) for i in order]
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats["fast_path"] + stats["hybrid"]
+        stats["fast_path_rate"] = stats["fast_path"] / total if total else None
+        return stats
+
+def build_retriever(texts, dense_index, name):
+    # None when disabled or when the store has no source text (dense search only)
+    if not HYBRID_RETRIEVAL or texts is None:
+        return None
+    return HybridRetriever(list(texts), dense_index, name=name)
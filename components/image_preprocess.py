@@ -0,0 +1,97 @@
+import os
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+# Adaptive image preprocessing for Tesseract. Large phone photos are first scaled
+# toward ~300 DPI (Tesseract's sweet spot), so the per-pixel steps that follow run
+# on far fewer pixels than the legacy full-resolution pipeline.
+OCR_TARGET_DPI = 300
+# Without DPI metadata, clamp the longest side to this range (A4 at 300 DPI is ~3500 px)
+OCR_MIN_SIDE = int(os.getenv("OCR_MIN_SIDE", "1200"))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3500"))
+
+def legacy_preprocess(image):
+    # Original pipeline: grayscale + median filter + 2x contrast at full resolution
+    image = image.convert('L')
+    image = image.filter(ImageFilter.MedianFilter())
+    return ImageEnhance.Contrast(image).enhance(2)
+
+def resize_for_ocr(image):
+    # Phones and screenshots stamp a nominal 72/96 DPI, so only scanner-like values are trusted
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] >= 150:
+        scale = OCR_TARGET_DPI / float(dpi[0])
+    else:
+        longest = max(image.size)
+        scale = OCR_MAX_SIDE / longest if longest > OCR_MAX_SIDE else OCR_MIN_SIDE / longest if longest < OCR_MIN_SIDE else 1.0
+    scale = min(max(scale, 0.25), 2.0)
+    if abs(scale - 1.0) < 0.05:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap box-averages first, then resamples only the last step
+    return image.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC, reducing_gap=2.0)
+
+def stretch_contrast(gray):
+    # Percentile stretch: maps the 1st..99th percentile to 0..255
+    low, high = np.percentile(gray, (1, 99))
+    if high - low < 1:
+        return gray
+    stretched = (gray.astype(np.float32) - low) * (255.0 / (high - low))
+    return np.clip(stretched, 0, 255).astype(np.uint8)
+
+def otsu_threshold(gray):
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+def binarize(gray):
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+def estimate_skew(gray, max_angle=5.0, step=0.5):
+    # Projection-profile search on a small copy: the angle whose row sums of ink
+    # vary most is the one where text lines are horizontal
+    small = Image.fromarray(gray)
+    small.thumbnail((800, 800))
+    ink = (np.asarray(small) < otsu_threshold(np.asarray(small))).astype(np.uint8) * 255
+    ink_image = Image.fromarray(ink)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rows = np.asarray(ink_image.rotate(angle, resample=Image.NEAREST, fillcolor=0)).sum(axis=1, dtype=np.float64)
+        score = np.var(rows)
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def crop_to_content(gray, margin=20, min_ink_fraction=0.005):
+    # Region of interest: the bounding box of rows/columns that carry ink, which
+    # trims photo borders and blank margins around the results table
+    ink = gray < otsu_threshold(gray)
+    rows = np.flatnonzero(ink.mean(axis=1) > min_ink_fraction)
+    cols = np.flatnonzero(ink.mean(axis=0) > min_ink_fraction)
+    if rows.size == 0 or cols.size == 0:
+        return gray
+    top, bottom = max(rows[0] - margin, 0), min(rows[-1] + margin + 1, gray.shape[0])
+    left, right = max(cols[0] - margin, 0), min(cols[-1] + margin + 1, gray.shape[1])
+    return gray[top:bottom, left:right]
+
+def adaptive_preprocess(image, deskew=False, binarize_output=False, crop=True, denoise=True):
+    image = resize_for_ocr(image.convert('L'))
+    if denoise:
+        # Median filter after resizing, so it touches at most ~OCR_MAX_SIDE^2 pixels
+        image = image.filter(ImageFilter.MedianFilter())
+    gray = stretch_contrast(np.asarray(image))
+
+    if deskew:
+        angle = estimate_skew(gray)
+        if angle:
+            gray = np.asarray(Image.fromarray(gray).rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255))
+    if crop:
+        gray = crop_to_content(gray)
+    if binarize_output:
+        gray = binarize(gray)
+    return Image.fromarray(gray)
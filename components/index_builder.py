@@ -0,0 +1,173 @@
+import argparse
+import csv
+import json
+import os
+import time
+import numpy as np
+from components.embedding_store import load_store, save_store
+from components.embeddings import EMBEDDING_MODEL_NAME, encode_many, get_embedding_model
+from components.result_cache import content_hash
+
+# Builds the FAQ/symptom embedding stores from source tables (CSV or JSONL). Rows are
+# keyed by a hash of the text that gets encoded, so an edit only re-encodes new or
+# changed questions/symptoms; everything else is copied from the existing store.
+# A store built with a different encoder model is always rebuilt from scratch.
+#   python -m components.index_builder faq data/faq.csv
+#   python -m components.index_builder symptom data/symptoms.jsonl --full --processes 4
+#   python -m components.index_builder faq --export data/faq.csv   (dump the current store)
+
+# Source column -> store field; "text" is the column that is encoded
+CORPORA = {
+    "faq": {
+        "prefix": "models/faq_embeddings",
+        "text": "question",
+        "columns": {"question": "questions", "answer": "answers"},
+    },
+    "symptom": {
+        "prefix": "models/symptom_embeddings",
+        "text": "symptom",
+        "columns": {"symptom": "symptoms", "disease": "diseases", "treatment": "treatments"},
+    },
+}
+
+# Full rebuilds of at least this many rows are encoded by one process per core
+BUILD_MULTIPROCESS_MIN_ROWS = int(os.getenv("BUILD_MULTIPROCESS_MIN_ROWS", "20000"))
+
+def text_hash(text):
+    return content_hash(" ".join(text.split()).encode("utf-8"))
+
+def read_table(path, corpus):
+    # Returns {field: [values]} in source order; accepts singular or plural headers
+    columns = CORPORA[corpus]["columns"]
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    table = {field: [] for field in columns.values()}
+    for n, row in enumerate(rows, 1):
+        for column, field in columns.items():
+            value = row.get(column, row.get(field))
+            if value is None:
+                raise ValueError(f"{path}: row {n} has no '{column}' column")
+            table[field].append(str(value).strip())
+    return table
+
+def _existing_vectors(prefix, corpus, model_name):
+    # {text hash: vector} from the current store, or {} if it is missing or stale
+    try:
+        data = load_store(prefix)
+    except FileNotFoundError:
+        return {}, "no existing store"
+    if data["model_name"] != model_name:
+        return {}, f"encoder changed ({data['model_name']} -> {model_name})"
+
+    # Stores converted from the legacy pickles have no hashes yet; derive them from the text
+    hashes = data.get("content_hashes")
+    if hashes is None:
+        texts = data.get(CORPORA[corpus]["columns"][CORPORA[corpus]["text"]])
+        if texts is None:
+            return {}, "existing store has no source text to match rows against"
+        hashes = [text_hash(t) for t in texts]
+    return {h: data["embeddings"][row] for row, h in enumerate(hashes)}, None
+
+def _existing_dtype(prefix):
+    try:
+        with open(f"{prefix}.meta.json", encoding="utf-8") as f:
+            return json.load(f)["dtype"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+def encode_texts(texts, batch_size=128, processes=1):
+    # One large batched call; big full rebuilds fan out over a process per core
+    if processes > 1 and len(texts) >= BUILD_MULTIPROCESS_MIN_ROWS:
+        model = get_embedding_model()
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * processes)
+        try:
+            return model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    return encode_many(texts, batch_size=batch_size, convert_to_tensor=False)
+
+def build_store(corpus, source, prefix=None, full=False, batch_size=128, processes=1, dtype=None):
+    spec = CORPORA[corpus]
+    prefix = prefix or spec["prefix"]
+    start = time.perf_counter()
+
+    table = read_table(source, corpus)
+    texts = table[spec["columns"][spec["text"]]]
+    if not texts:
+        raise ValueError(f"{source} has no rows")
+    hashes = [text_hash(t) for t in texts]
+
+    reason = "full rebuild requested"
+    existing = {}
+    if not full:
+        existing, reason = _existing_vectors(prefix, corpus, EMBEDDING_MODEL_NAME)
+    if dtype is None:
+        dtype = _existing_dtype(prefix) or "float32"
+
+    # Encode each new or changed text once, even if it appears in several rows
+    missing = list(dict.fromkeys(h for h in hashes if h not in existing))
+    text_of = dict(zip(hashes, texts))
+    vectors = dict(existing)
+    if missing:
+        encoded = encode_texts([text_of[h] for h in missing], batch_size, processes)
+        vectors.update(zip(missing, np.asarray(encoded, dtype=np.float32)))
+
+    matrix = np.stack([np.asarray(vectors[h], dtype=np.float32) for h in hashes])
+    save_store(prefix, matrix, dict(table, content_hashes=hashes), model_name=EMBEDDING_MODEL_NAME, dtype=dtype)
+
+    return {
+        "corpus": corpus,
+        "prefix": prefix,
+        "rows": len(hashes),
+        "encoded": len(missing),
+        "reused": sum(h in existing for h in hashes),
+        "removed": len(set(existing) - set(hashes)),
+        "rebuild_reason": reason,
+        "model_name": EMBEDDING_MODEL_NAME,
+        "dtype": dtype,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+def export_table(corpus, path, prefix=None):
+    # Writes the current store's fields as a source table to start editing from
+    spec = CORPORA[corpus]
+    data = load_store(prefix or spec["prefix"])
+    columns = {column: field for column, field in spec["columns"].items() if field in data}
+    rows = [dict(zip(columns, values)) for values in zip(*(data[field] for field in columns.values()))]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=list(columns))
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    return len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or incrementally update an embedding store from a source table")
+    parser.add_argument("corpus", choices=sorted(CORPORA))
+    parser.add_argument("source", nargs="?", help="Source table (.csv or .jsonl)")
+    parser.add_argument("--prefix", help="Store prefix (default: models/<corpus>_embeddings)")
+    parser.add_argument("--full", action="store_true", help="Re-encode every row")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Encoder processes for large rebuilds")
+    parser.add_argument("--dtype", choices=["float32", "float16"], help="Default: keep the existing store's dtype")
+    parser.add_argument("--export", metavar="PATH", help="Write the current store as a source table and exit")
+    args = parser.parse_args()
+
+    if args.export:
+        count = export_table(args.corpus, args.export, args.prefix)
+        print(f"✅ Exported {count} rows to {args.export}")
+    elif not args.source:
+        parser.error("a source table is required unless --export is given")
+    else:
+        report = build_store(args.corpus, args.source, args.prefix, args.full, args.batch_size, args.processes, args.dtype)
+        print(
+            f"✅ {report['prefix']}: {report['rows']} rows, {report['encoded']} encoded, "
+            f"{report['reused']} reused, {report['removed']} removed in {report['seconds']}s"
+            + (f" ({report['rebuild_reason']})" if report["rebuild_reason"] else "")
+        )
@@ -0,0 +1,136 @@
+import re
+
+# Lab thresholds for rule-based explanation
+lab_thresholds = {
+    # Blood Parameters
+    "Hemoglobin": {"low": 12.0, "high": 18.0, "unit": "g/dL"},
+    "Total Erythrocytes": {"low": 4.5, "high": 6.0, "unit": "million/µL"},
+    "HCT": {"low": 36.0, "high": 50.0, "unit": "%"},
+    "MCV": {"low": 80.0, "high": 100.0, "unit": "fL"},
+    "MCH": {"low": 27.0, "high": 33.0, "unit": "pg"},
+    "MCHC": {"low": 32.0, "high": 36.0, "unit": "g/dL"},
+    "RDW": {"low": 11.5, "high": 14.5, "unit": "%"},
+    "Platelets": {"low": 150, "high": 450, "unit": "thousand/µL"},
+    "MPV": {"low": 7.5, "high": 11.5, "unit": "fL"},
+
+    # White Blood Cells
+    "WBC": {"low": 4.0, "high": 11.0, "unit": "thousand/µL"},
+    "Neutrophils": {"low": 40, "high": 75, "unit": "%"},
+    "Lymphocytes": {"low": 20, "high": 40, "unit": "%"},
+    "Monocytes": {"low": 2, "high": 8, "unit": "%"},
+    "Eosinophils": {"low": 1, "high": 6, "unit": "%"},
+    "Basophils": {"low": 0, "high": 1, "unit": "%"},
+
+    # Kidney Function
+    "Creatinine": {"low": 0.6, "high": 1.3, "unit": "mg/dL"},
+    "BUN": {"low": 7, "high": 20, "unit": "mg/dL"},
+    "Urea": {"low": 10, "high": 50, "unit": "mg/dL"},
+
+    # Liver Function
+    "Bilirubin": {"low": 0.1, "high": 1.2, "unit": "mg/dL"},
+    "SGPT": {"low": 7, "high": 56, "unit": "U/L"},  # ALT
+    "SGOT": {"low": 8, "high": 45, "unit": "U/L"},  # AST
+    "Alkaline Phosphatase": {"low": 44, "high": 147, "unit": "U/L"},
+
+    # Lipid Profile
+    "HDL": {"low": 40, "high": 60, "unit": "mg/dL"},
+    "LDL": {"low": 0, "high": 100, "unit": "mg/dL"},
+    "Total Cholesterol": {"low": 125, "high": 200, "unit": "mg/dL"},
+    "Triglycerides": {"low": 0, "high": 150, "unit": "mg/dL"},
+
+    # Thyroid
+    "TSH": {"low": 0.4, "high": 4.0, "unit": "mIU/L"},
+    "T3": {"low": 80, "high": 200, "unit": "ng/dL"},
+    "T4": {"low": 4.5, "high": 12.5, "unit": "µg/dL"},
+
+    # Diabetes / Sugar
+    "Glucose": {"low": 70, "high": 140, "unit": "mg/dL"},
+    "HbA1c": {"low": 4.0, "high": 5.6, "unit": "%"},
+    "Fasting Blood Sugar": {"low": 70, "high": 99, "unit": "mg/dL"},
+    "Postprandial Blood Sugar": {"low": 70, "high": 140, "unit": "mg/dL"},
+
+    # Electrolytes
+    "Sodium": {"low": 135, "high": 145, "unit": "mmol/L"},
+    "Potassium": {"low": 3.5, "high": 5.0, "unit": "mmol/L"},
+    "Chloride": {"low": 96, "high": 106, "unit": "mmol/L"},
+    "Calcium": {"low": 8.5, "high": 10.5, "unit": "mg/dL"},
+    "Uric Acid": {"low": 3.5, "high": 7.2, "unit": "mg/dL"},
+
+    # Inflammation Markers
+    "CRP": {"low": 0, "high": 3, "unit": "mg/L"},
+    "ESR": {"low": 0, "high": 20, "unit": "mm/hr"},
+
+    # Vitamins
+    "Vitamin D": {"low": 20, "high": 50, "unit": "ng/mL"},
+    "Vitamin B12": {"low": 200, "high": 900, "unit": "pg/mL"},
+}
+
+# Alternative spellings / abbreviations reported under the canonical term above
+lab_aliases = {
+    "Hemoglobin": ["Haemoglobin"],
+    "Total Erythrocytes": ["RBC Count"],
+    "HCT": ["Hematocrit", "Haematocrit", "PCV"],
+    "Platelets": ["Platelet Count"],
+    "WBC": ["Total Leukocyte Count", "TLC"],
+    "BUN": ["Blood Urea Nitrogen"],
+    "SGPT": ["ALT"],
+    "SGOT": ["AST"],
+    "Fasting Blood Sugar": ["FBS"],
+    "Postprandial Blood Sugar": ["PPBS"],
+}
+
+# Numbers with optional thousands grouping (1,50,000 or 150,000) and decimals
+_NUMBER = re.compile(r"\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+
+def _build_matcher():
+    # One alternation over every term and alias, longest first so "MCHC" wins over "MCH"
+    # and "Blood Urea Nitrogen" over "Urea"; compiled once at import
+    canonical = {term.lower(): term for term in lab_thresholds}
+    for term, aliases in lab_aliases.items():
+        canonical.update({alias.lower(): term for alias in aliases})
+    names = sorted(canonical, key=len, reverse=True)
+    pattern = r"(?<![A-Za-z0-9])(" + "|".join(re.escape(n) for n in names) + r")(?![A-Za-z0-9])"
+    return re.compile(pattern, re.IGNORECASE), canonical
+
+_TERM_PATTERN, _CANONICAL = _build_matcher()
+
+# Counts reported per µL (e.g. platelets "1,50,000") are rescaled to the table's unit
+_UNIT_SCALE = {"thousand/µL": 1e3, "million/µL": 1e6}
+
+def classify_value(value, ranges):
+    return "Low" if value < ranges["low"] else "High" if value > ranges["high"] else "Normal"
+
+def extract_lab_values(text, seen=None):
+    # Single pass over the text: each matched term takes the first number between it
+    # and the next term on the same line. A term reported under several aliases with
+    # the same value (e.g. "SGPT (ALT) 40") is only reported once. Pass the same
+    # `seen` set when feeding a report page by page.
+    results = []
+    seen = set() if seen is None else seen
+    for line in text.splitlines():
+        matches = list(_TERM_PATTERN.finditer(line))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(line)
+            number = _NUMBER.search(line, match.end(), end)
+            if not number:
+                continue
+            term = _CANONICAL[match.group(1).lower()]
+            ranges = lab_thresholds[term]
+            value = float(number.group().replace(",", ""))
+            scale = _UNIT_SCALE.get(ranges["unit"])
+            if scale and value >= scale:
+                value /= scale
+            if (term, value) in seen:
+                continue
+            seen.add((term, value))
+
+            results.append({
+                "term": term,
+                "value": value,
+                "unit": ranges["unit"],
+                "low": ranges["low"],
+                "high": ranges["high"],
+                "status": classify_value(value, ranges),
+                "line": line.strip(),
+            })
+    return results
@@ -0,0 +1,136 @@
+import json
+import os
+import random
+import threading
+import time
+from components.metrics import increment, record_stage
+from components.model_registry import get_resource, register
+
+# Shared client for every Gemini call in the app. Each call gets a deadline,
+# a slot from a process-wide concurrency limit, and jittered retries on
+# transient errors.
+# LLM_BACKEND=gemini (default) or http (LLM_BASE_URL, e.g. the local fake server in
+# components/fake_llm_server.py).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://127.0.0.1:8009")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "0.5"))
+
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+class LLMError(Exception):
+    pass
+
+class LLMTimeoutError(LLMError):
+    pass
+
+def register_model(model_name, priority=40, label=None):
+    # Registers a Gemini model with the registry so warm-up can configure it early
+    def load():
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("PALM_API_KEY"))
+        return genai.GenerativeModel(model_name)
+    return register(f"gemini:{model_name}", load, priority=priority, label=label or model_name)
+
+def backend_id(model_name):
+    # Names the backend + model behind a completion; cache namespaces include it so
+    # fake-server output is never served as a Gemini summary
+    return f"{LLM_BACKEND}:{model_name}"
+
+# Rate limiting, server errors and gateway timeouts are worth another attempt
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+def _status_code(error):
+    # HTTP status of a failed call: requests errors carry the response,
+    # google.api_core errors expose it as .code
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) is not None:
+        return response.status_code
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+def _is_retryable(error):
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    # No status: only transport failures (connection reset, read timeout) are transient
+    if LLM_BACKEND == "http":
+        import requests
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+def _remaining(deadline):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise LLMTimeoutError("LLM call exceeded its deadline")
+    return remaining
+
+def _gemini_chunks(prompt, model_name, timeout):
+    model = get_resource(register_model(model_name))
+    response = model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+    for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+def _http_chunks(prompt, model_name, timeout):
+    # Fake/local backend protocol: POST JSON, newline-delimited {"text": ...} chunks back
+    import requests
+    with requests.post(
+        f"{LLM_BASE_URL}/generate",
+        json={"model": model_name, "prompt": prompt, "stream": True},
+        timeout=timeout,
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)["text"]
+
+def stream(prompt, model_name, timeout=None):
+    # Yields the accumulated text as chunks arrive. Retries only before the first
+    # chunk, so callers never see a partial answer restart.
+    deadline = time.monotonic() + (timeout or LLM_TIMEOUT_SECONDS)
+    start = time.perf_counter()
+    if not _slots.acquire(timeout=_remaining(deadline)):
+        raise LLMTimeoutError("Timed out waiting for a free LLM slot")
+    record_stage("llm.slot_wait", time.perf_counter() - start, start)
+    outcome = "error"
+    try:
+        backend = _http_chunks if LLM_BACKEND == "http" else _gemini_chunks
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            text = ""
+            try:
+                for chunk in backend(prompt, model_name, _remaining(deadline)):
+                    if not text:
+                        record_stage("llm.first_chunk", time.perf_counter() - start, start)
+                    text += chunk
+                    yield text
+                    _remaining(deadline)
+                outcome = "ok"
+                return
+            except LLMTimeoutError:
+                outcome = "timeout"
+                raise
+            except Exception as e:
+                if text or attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                increment("therapybot_llm_retries_total", model=model_name)
+                # Exponential backoff with full jitter, capped by the deadline
+                delay = random.uniform(0, LLM_BACKOFF_SECONDS * 2 ** attempt)
+                time.sleep(min(delay, _remaining(deadline)))
+    except GeneratorExit:
+        # The caller stopped reading (e.g. the user left mid-stream)
+        outcome = "cancelled"
+        raise
+    finally:
+        _slots.release()
+        record_stage("llm.call", time.perf_counter() - start, start)
+        increment("therapybot_llm_calls_total", model=model_name, outcome=outcome)
+
+def generate(prompt, model_name, timeout=None):
+    text = ""
+    for text in stream(prompt, model_name, timeout):
+        pass
+    return text
@@ -1,32 +1,115 @@
 import os
 import io
-from google.cloud import vision
+import asyncio
+import time
 from PIL import Image
+from components.metrics import timed
+from components.model_registry import get_resource, register
 
-def get_vision_client():
+# GCV_BACKEND=google (default) calls Cloud Vision; GCV_BACKEND=stub returns canned text
+# locally (GCV_STUB_TEXT, GCV_STUB_LATENCY_MS) so the OCR path can be load-tested offline
+GCV_BACKEND = os.getenv("GCV_BACKEND", "google")
+
+# Uploads are downscaled to this longest side and sent as JPEG to shrink request bytes
+GCV_MAX_SIDE = int(os.getenv("GCV_MAX_SIDE", "2048"))
+GCV_JPEG_QUALITY = int(os.getenv("GCV_JPEG_QUALITY", "90"))
+
+# Cloud Vision accepts at most 16 images per batch_annotate_images request
+GCV_BATCH_LIMIT = 16
+
+STUB_TEXT = """Hemoglobin 13.5 g/dL
+WBC 7.2 thousand/uL
+Platelets 250 thousand/uL
+Glucose 110 mg/dL
+TSH 2.1 mIU/L"""
+
+def _load_vision_client():
+    from google.cloud import vision
     api_key_path = os.getenv("GCV_API_KEY")  # ✅ Path to JSON from Hugging Face secret
     if not api_key_path:
         raise ValueError("❌ GCV_API_KEY not set in environment variables.")
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = api_key_path
-    return vision.ImageAnnotatorClient()
+    # One long-lived client: its gRPC channel is reused across requests
+    return vision.ImageAnnotatorClient.from_service_account_file(api_key_path)
+
+register("gcv_client", _load_vision_client, priority=45, label="Google Cloud Vision client")
+
+def get_vision_client():
+    return get_resource("gcv_client")
+
+def encode_image(pil_image):
+    # Downscale large phone photos and encode as JPEG instead of lossless PNG
+    image = pil_image
+    if max(image.size) > GCV_MAX_SIDE:
+        image = image.copy()
+        image.thumbnail((GCV_MAX_SIDE, GCV_MAX_SIDE), Image.LANCZOS)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=GCV_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def _stub_text():
+    time.sleep(float(os.getenv("GCV_STUB_LATENCY_MS", "0")) / 1000.0)
+    return os.getenv("GCV_STUB_TEXT", STUB_TEXT)
+
+def _response_text(response):
+    if response.error.message:
+        return f"❌ Google Vision Error: {response.error.message}"
+
+    annotations = response.text_annotations
+    if annotations:
+        return annotations[0].description.strip()
+    else:
+        return "❌ No text found in the image."
 
 def extract_text_gcv(pil_image):
     try:
-        client = get_vision_client()
+        if GCV_BACKEND == "stub":
+            with timed("ocr.gcv"):
+                return _stub_text()
 
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format="PNG")
-        image = vision.Image(content=buffer.getvalue())
+        from google.cloud import vision
+        client = get_vision_client()
+        with timed("ocr.encode_image"):
+            image = vision.Image(content=encode_image(pil_image))
+        with timed("ocr.gcv"):
+            response = client.text_detection(image=image)
+        return _response_text(response)
 
-        response = client.text_detection(image=image)
-        if response.error.message:
-            return f"❌ Google Vision Error: {response.error.message}"
+    except Exception as e:
+        return f"❌ Exception: {e}"
 
-        annotations = response.text_annotations
-        if annotations:
-            return annotations[0].description.strip()
-        else:
-            return "❌ No text found in the image."
+def extract_texts_gcv(pil_images):
+    # OCR several images with batch_annotate_images (16 per request); one result per image
+    try:
+        if GCV_BACKEND == "stub":
+            return [_stub_text() for _ in pil_images]
 
+        from google.cloud import vision
+        client = get_vision_client()
+        feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
     except Exception as e:
-        return f"❌ Exception: {e}"
\ No newline at end of file
+        return [f"❌ Exception: {e}"] * len(pil_images)
+
+    # A failed request only costs its own chunk; results of the other chunks are kept
+    texts = []
+    for start in range(0, len(pil_images), GCV_BATCH_LIMIT):
+        chunk = pil_images[start:start + GCV_BATCH_LIMIT]
+        try:
+            requests = [
+                vision.AnnotateImageRequest(image=vision.Image(content=encode_image(img)), features=[feature])
+                for img in chunk
+            ]
+            with timed("ocr.gcv"):
+                response = client.batch_annotate_images(requests=requests)
+            texts += [_response_text(r) for r in response.responses]
+        except Exception as e:
+            texts += [f"❌ Exception: {e}"] * len(chunk)
+    return texts
+
+async def extract_text_gcv_async(pil_image):
+    # The shared client is thread-safe, so async callers run the blocking call in a thread
+    return await asyncio.to_thread(extract_text_gcv, pil_image)
+
+async def extract_texts_gcv_async(pil_images):
+    return await asyncio.to_thread(extract_texts_gcv, pil_images)
@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Lightweight in-process metrics: per-stage latency histograms and counters, rendered
+# in Prometheus text format at /metrics (see mount_metrics). Stages are named
+# "<area>.<step>", e.g. "ocr.tesseract", "embed.encode", "chat.generate", "llm.call".
+#
+# Opt-in slow request traces: with METRICS_SLOW_REQUEST_SECONDS set, every handler
+# wrapped by instrument() that takes longer is written to METRICS_TRACE_PATH as one
+# JSON line listing its stage spans; METRICS_PROFILE=1 adds the top cProfile entries.
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", "0"))
+METRICS_TRACE_PATH = os.getenv("METRICS_TRACE_PATH", "traces/slow_requests.jsonl")
+METRICS_PROFILE = os.getenv("METRICS_PROFILE", "0") == "1"
+
+# Seconds; spans fast stages (encode, top-k) through slow ones (OCR, LLM calls)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+_lock = threading.Lock()
+# {(metric name, ((label, value), ...)): Histogram} and {...: count}
+_histograms = {}
+_counters = {}
+# name -> (help text, callable returning {((label, value), ...): number})
+_gauges = {}
+
+_HELP = {
+    "therapybot_stage_seconds": "Time spent in one stage of a request",
+    "therapybot_request_seconds": "End-to-end handler latency",
+    "therapybot_requests_total": "Handler calls by outcome",
+    "therapybot_llm_calls_total": "LLM calls by outcome",
+    "therapybot_llm_retries_total": "LLM calls retried after a transient error",
+}
+
+# Spans of the request being handled on this thread/context, or None
+_current_trace = contextvars.ContextVar("therapybot_trace", default=None)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+def increment(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def register_gauge(name, help_text, collect):
+    # collect() is called at scrape time, so gauges cost nothing between scrapes
+    _gauges[name] = (help_text, collect)
+
+def record_stage(stage, seconds, start=None):
+    observe("therapybot_stage_seconds", seconds, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        start = time.perf_counter() - seconds if start is None else start
+        trace["spans"].append({
+            "stage": stage,
+            "offset_ms": round((start - trace["start"]) * 1000.0, 3),
+            "ms": round(seconds * 1000.0, 3),
+            "thread": threading.current_thread().name,
+        })
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, start)
+
+def propagate(fn):
+    # Runs fn in a worker thread with the caller's trace, so its stages land in the same trace
+    return functools.partial(contextvars.copy_context().run, fn)
+
+# --- Per-request wrapper for tab handlers (plain functions and generators)
+
+def _finish(handler, trace, profiler, outcome):
+    elapsed = time.perf_counter() - trace["start"]
+    observe("therapybot_request_seconds", elapsed, handler=handler)
+    increment("therapybot_requests_total", handler=handler, outcome=outcome)
+    if METRICS_SLOW_REQUEST_SECONDS and elapsed >= METRICS_SLOW_REQUEST_SECONDS:
+        record = {
+            "handler": handler,
+            "outcome": outcome,
+            "started_at": trace["wall_start"],
+            "total_ms": round(elapsed * 1000.0, 3),
+            "spans": trace["spans"],
+        }
+        if profiler is not None and profiler.getstats():
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+            record["profile"] = out.getvalue()
+        _write_trace(record)
+
+def _write_trace(record):
+    if os.path.dirname(METRICS_TRACE_PATH):
+        os.makedirs(os.path.dirname(METRICS_TRACE_PATH), exist_ok=True)
+    with _lock, open(METRICS_TRACE_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+def _enable(profiler):
+    # Only one profiler can be active per process on Python 3.12+, so concurrent slow
+    # requests are profiled best-effort; returns whether this one got it
+    if profiler is None:
+        return False
+    try:
+        profiler.enable()
+        return True
+    except ValueError:
+        return False
+
+def _new_trace():
+    return {"start": time.perf_counter(), "wall_start": time.time(), "spans": []}
+
+def instrument(handler):
+    # Decorator: times the whole call, counts outcomes and collects stage spans. Generator
+    # handlers stay generator functions (Gradio streams them), and each step runs under
+    # the request's trace even if Gradio resumes it on a different worker thread.
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                trace = _new_trace()
+                profiler = cProfile.Profile() if METRICS_PROFILE else None
+                gen = fn(*args, **kwargs)
+                outcome = "ok"
+                try:
+                    while True:
+                        token = _current_trace.set(trace)
+                        profiling = _enable(profiler)
+                        try:
+                            value = next(gen)
+                        except StopIteration:
+                            return
+                        finally:
+                            if profiling:
+                                profiler.disable()
+                            _current_trace.reset(token)
+                        yield value
+                except GeneratorExit:
+                    outcome = "cancelled"
+                    raise
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    gen.close()
+                    _finish(handler, trace, profiler, outcome)
+            return wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _new_trace()
+            profiler = cProfile.Profile() if METRICS_PROFILE else None
+            token = _current_trace.set(trace)
+            outcome = "ok"
+            profiling = _enable(profiler)
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                if profiling:
+                    profiler.disable()
+                _current_trace.reset(token)
+                _finish(handler, trace, profiler, outcome)
+        return wrapper
+    return decorate
+
+# --- Prometheus text exposition
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def render_prometheus():
+    with _lock:
+        histograms = {k: (list(h.counts), h.total, h.count, h.buckets) for k, h in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for name in sorted({name for name, _ in histograms}):
+        lines += [f"# HELP {name} {_HELP.get(name, name)}", f"# TYPE {name} histogram"]
+        for (metric, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for name in sorted({name for name, _ in counters}):
+        lines += [f"# HELP {name} {_HELP.get(name, name)}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_format_labels(labels)} {value}" for (metric, labels), value in sorted(counters.items()) if metric == name]
+
+    for name, (help_text, collect) in sorted(_gauges.items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        try:
+            values = collect()
+        except Exception:
+            continue
+        lines += [f"{name}{_format_labels(labels)} {value}" for labels, value in values.items() if value is not None]
+    return "\n".join(lines) + "\n"
+
+def mount_metrics(app, path="/metrics"):
+    # Adds the scrape endpoint to the FastAPI app Gradio serves from (ahead of Gradio's own routes)
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    def endpoint(request):
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+    app.router.routes.insert(0, Route(path, endpoint, methods=["GET"]))
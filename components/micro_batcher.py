@@ -0,0 +1,87 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    # Coalesces items submitted from many threads into batches for one call.
+    # process_batch receives a list of items and must return one result per item.
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=10, name="micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "max_batch_seen": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0}
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def submit(self, item):
+        # Returns a Future resolved with this item's result once its batch runs
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self):
+        # Block for the first item, then gather more until the batch is full or the window closes
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            items = [item for item, _, _ in batch]
+            try:
+                results = list(self.process_batch(items))
+                if len(results) != len(batch):
+                    raise ValueError(f"{self.name}: process_batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                # Every waiter gets the error; none is left blocked on a missing result
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(batch)
+                self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
+                self._stats["queue_wait_total"] += sum(waits)
+                self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], max(waits))
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches, items = stats["batches"], stats["items"]
+        stats["avg_batch_size"] = items / batches if batches else None
+        # Fraction of batch slots actually used, and mean time items spent queued
+        stats["fill_rate"] = items / (batches * self.max_batch_size) if batches else None
+        stats["avg_queue_wait_ms"] = stats["queue_wait_total"] / items * 1000.0 if items else None
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        return stats
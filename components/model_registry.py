@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Heavy resources (models, embedding stores, API clients) are registered with a loader
+# at import time and only loaded on first use or by the background warm-up thread.
+
+class _Resource:
+    def __init__(self, name, loader, priority, label):
+        self.name = name
+        self.loader = loader
+        self.priority = priority
+        self.label = label or name
+        self.value = None
+        self.state = "not loaded"
+        self.load_seconds = None
+        self.error = None
+        self.lock = threading.Lock()
+
+_resources = {}
+_startup_phases = []
+_warm_up_thread = None
+
+def register(name, loader, priority=100, label=None):
+    # Lower priority values are warmed up first
+    if name not in _resources:
+        _resources[name] = _Resource(name, loader, priority, label)
+    return name
+
+def get_resource(name):
+    # Load on first use; concurrent callers wait for the same load
+    resource = _resources[name]
+    if resource.state == "ready":
+        return resource.value
+    with resource.lock:
+        if resource.state != "ready":
+            resource.state = "loading"
+            start = time.perf_counter()
+            try:
+                resource.value = resource.loader()
+            except Exception as e:
+                resource.state = "failed"
+                resource.error = str(e)
+                raise
+            resource.load_seconds = time.perf_counter() - start
+            resource.error = None
+            resource.state = "ready"
+    return resource.value
+
+def is_ready(name):
+    return name in _resources and _resources[name].state == "ready"
+
+def _warm_up():
+    for resource in sorted(_resources.values(), key=lambda r: r.priority):
+        try:
+            get_resource(resource.name)
+        except Exception:
+            # Recorded on the resource; the tab retries on first use
+            continue
+
+def start_warm_up():
+    # Preload every registered resource in priority order; WARMUP=0 keeps loading fully lazy
+    global _warm_up_thread
+    if os.getenv("WARMUP", "1") != "1" or _warm_up_thread is not None:
+        return
+    _warm_up_thread = threading.Thread(target=_warm_up, name="model-warm-up", daemon=True)
+    _warm_up_thread.start()
+
+def get_status():
+    return [
+        {
+            "name": r.name,
+            "label": r.label,
+            "state": r.state,
+            "load_seconds": r.load_seconds,
+            "error": r.error,
+        }
+        for r in sorted(_resources.values(), key=lambda r: r.priority)
+    ]
+
+def status_markdown():
+    icons = {"ready": "✅", "loading": "⏳", "failed": "❌", "not loaded": "💤"}
+    lines = ["| Model | Status | Load time |", "|---|---|---|"]
+    for r in get_status():
+        load_time = f"{r['load_seconds']:.1f}s" if r["load_seconds"] is not None else "–"
+        state = f"{icons[r['state']]} {r['state']}"
+        if r["error"]:
+            state += f" ({r['error'][:80]})"
+        lines.append(f"| {r['label']} | {state} | {load_time} |")
+    return "\n".join(lines)
+
+@contextmanager
+def startup_phase(name):
+    # Times one step of app startup for startup_report()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup_phases.append((name, time.perf_counter() - start))
+
+def startup_report():
+    lines = ["⏱️ Startup time breakdown:"]
+    lines += [f"  {name:<32} {seconds:7.2f}s" for name, seconds in _startup_phases]
+    lines.append(f"  {'total':<32} {sum(s for _, s in _startup_phases):7.2f}s")
+    loaded = [r for r in get_status() if r["load_seconds"] is not None]
+    if loaded:
+        lines.append("⏱️ Model load times:")
+        lines += [f"  {r['label']:<32} {r['load_seconds']:7.2f}s" for r in loaded]
+    return "\n".join(lines)
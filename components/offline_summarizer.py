@@ -0,0 +1,47 @@
+from components.lab_extraction import extract_lab_values
+
+# Deterministic, local summary built from the lab_thresholds table. Produces the same
+# sections as the Gemini prompt in milliseconds, with no API cost.
+
+def _range(v):
+    return f"{v['low']}-{v['high']} {v['unit']}"
+
+def summarize_offline(text, lab_values=None):
+    lab_values = extract_lab_values(text) if lab_values is None else lab_values
+    if not lab_values:
+        return (
+            "**Summary**: No known lab values could be recognised in this report.\n\n"
+            "**Health Recommendations**:\n"
+            "- Please share the report with your doctor for interpretation."
+        )
+
+    abnormal = [v for v in lab_values if v["status"] != "Normal"]
+    if abnormal:
+        overview = (
+            f"{len(lab_values)} lab values were recognised; {len(abnormal)} "
+            f"{'is' if len(abnormal) == 1 else 'are'} outside the reference range "
+            f"({', '.join(v['term'] for v in abnormal)})."
+        )
+    else:
+        overview = f"{len(lab_values)} lab values were recognised and all are within their reference ranges."
+
+    findings = [f"- {v['term']}: {v['value']:g} {v['unit']} ({v['status']}; normal {_range(v)})" for v in lab_values]
+
+    if abnormal:
+        abnormal_lines = [
+            f"- **{v['term']}** is {v['status'].lower()} at {v['value']:g} {v['unit']} "
+            f"({'below' if v['status'] == 'Low' else 'above'} the normal range of {_range(v)})."
+            for v in abnormal
+        ]
+    else:
+        abnormal_lines = ["- None detected."]
+
+    recommendations = ["- Always consult a doctor before making medical decisions based on these results."]
+    if abnormal:
+        recommendations.insert(0, "- Discuss the abnormal values above with your doctor; a repeat test may be advised.")
+
+    return "\n".join(
+        [f"**Summary**: {overview}", "", "**Key Findings**:"] + findings +
+        ["", "**Abnormal Values**:"] + abnormal_lines +
+        ["", "**Health Recommendations**:"] + recommendations
+    )
@@ -1,16 +1,16 @@
-import os
-import google.generativeai as genai
-
-# Load API key - Use consistent environment variable name
-genai.configure(api_key=os.getenv("PALM_API_KEY"))
+from components import llm_client
+from components.llm_client import LLMTimeoutError
 
 # Updated model name and configuration
-model = genai.GenerativeModel("gemini-1.5-flash")  # or "gemini-1.5-pro"
+MODEL_NAME = "gemini-1.5-flash"  # or "gemini-1.5-pro"
+llm_client.register_model(MODEL_NAME, priority=40, label="Gemini 1.5 Flash (OCR summary)")
 
-def summarize_with_palm(text):
-    try:
-        # Enhanced prompt for medical reports
-        prompt = f"""
+# Bump when the prompt changes so cached summaries are not reused
+PROMPT_VERSION = "palm-v1"
+
+def build_prompt(text):
+    # Enhanced prompt for medical reports
+    return f"""
 You are a medical assistant specializing in health report analysis. Please analyze the following medical/lab report and provide:
 
 1. **Summary**: A concise 2-3 line summary of the overall health status
@@ -25,24 +25,39 @@ Report Text:
 
 Please format your response clearly with the above sections.
 """
-        
-        # Generate content with the updated API
-        response = model.generate_content(prompt)
-        
-        # Check if response is valid
-        if response and response.text:
-            return response.text.strip()
-        else:
-            return "❌ No summary could be generated from the report."
-            
+
+def _error_message(e):
+    # Better error handling with specific error types
+    error_msg = str(e)
+    if isinstance(e, LLMTimeoutError):
+        return f"❌ Summarization timed out: {error_msg}"
+    elif "API_KEY" in error_msg.upper():
+        return "❌ API Key error: Please check your PALM_API_KEY environment variable."
+    elif "QUOTA" in error_msg.upper():
+        return "❌ API Quota exceeded: Please check your Google AI Studio quota."
+    elif "404" in error_msg:
+        return "❌ Model not found: Please verify the model name and API access."
+    else:
+        return f"❌ Summarization error: {error_msg}"
+
+def summarize_with_palm_stream(text, timeout=None):
+    # Yields the summary generated so far, ending with the complete summary or an error
+    summary = ""
+    try:
+        for summary in llm_client.stream(build_prompt(text), MODEL_NAME, timeout=timeout):
+            yield summary
     except Exception as e:
-        # Better error handling with specific error types
-        error_msg = str(e)
-        if "API_KEY" in error_msg.upper():
-            return "❌ API Key error: Please check your PALM_API_KEY environment variable."
-        elif "QUOTA" in error_msg.upper():
-            return "❌ API Quota exceeded: Please check your Google AI Studio quota."
-        elif "404" in error_msg:
-            return "❌ Model not found: Please verify the model name and API access."
-        else:
-            return f"❌ Summarization error: {error_msg}"
\ No newline at end of file
+        yield _error_message(e)
+        return
+
+    # Check if response is valid
+    if not summary.strip():
+        yield "❌ No summary could be generated from the report."
+    else:
+        yield summary.strip()
+
+def summarize_with_palm(text):
+    summary = ""
+    for summary in summarize_with_palm_stream(text):
+        pass
+    return summary
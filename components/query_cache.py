@@ -0,0 +1,166 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text):
+    # Case, whitespace and punctuation-insensitive cache key
+    text = _PUNCTUATION.sub(" ", (text or "").lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+class QueryCache:
+    # Bounded LRU cache with per-entry TTL and hit/miss counters
+    def __init__(self, max_size=1024, ttl_seconds=3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+class SemanticCache:
+    # Reuses a previous result when a new query embedding is within a cosine
+    # threshold of a cached one. Entries live in a fixed-size ring buffer.
+    def __init__(self, threshold=0.95, max_size=256):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._vectors = None
+        self._values = [None] * max_size
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding):
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._count:
+                scores = self._vectors[:self._count] @ vector
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self._values[best]
+            self.misses += 1
+            return None
+
+    def put(self, embedding, value):
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            self._vectors[self._next] = vector
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.max_size
+            self._count = min(self._count + 1, self.max_size)
+
+    def clear(self):
+        with self._lock:
+            self._values = [None] * self.max_size
+            self._count = 0
+            self._next = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._count,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+class TieredCache:
+    # Exact normalized-query cache in front of an optional semantic tier
+    def __init__(self, max_size=None, ttl_seconds=None, semantic_threshold=None):
+        max_size = max_size or int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+        ttl_seconds = ttl_seconds or float(os.getenv("QUERY_CACHE_TTL", "3600"))
+        if semantic_threshold is None and os.getenv("SEMANTIC_CACHE_THRESHOLD"):
+            semantic_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD"))
+
+        self.exact = QueryCache(max_size, ttl_seconds)
+        self.semantic = SemanticCache(semantic_threshold) if semantic_threshold else None
+        # When False every lookup runs fast_path/embed/compute and nothing is stored
+        # (e.g. to benchmark uncached latency)
+        self.enabled = True
+
+    def lookup(self, query, embed, compute, fast_path=None):
+        # embed(query) -> embedding; compute(embedding) -> result. fast_path(query) may
+        # return a result without an embedding (or None to fall through to embed/compute).
+        key = normalize_query(query)
+        semantic = self.semantic if self.enabled else None
+        value = self.exact.get(key) if self.enabled else None
+        if value is not None:
+            return value
+
+        if fast_path is not None:
+            value = fast_path(query)
+        if value is None:
+            embedding = embed(query)
+            if semantic is not None:
+                value = semantic.get(embedding)
+            if value is None:
+                value = compute(embedding)
+                if semantic is not None:
+                    semantic.put(embedding, value)
+        if self.enabled:
+            self.exact.put(key, value)
+        return value
+
+    def clear(self):
+        self.exact.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+
+    def get_stats(self):
+        return {
+            "exact": self.exact.get_stats(),
+            "semantic": self.semantic.get_stats() if self.semantic is not None else None,
+        }
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from components.lab_extraction import extract_lab_values
+from components.offline_summarizer import summarize_offline
+from components.report_text import iter_report_pages
+
+# Batch Report Analyzer: OCR/text extraction and lab-threshold analysis across a
+# process pool, yielding one result per file as soon as it completes.
+#   python -m components.report_batch reports/ --workers 8 > results.jsonl
+
+REPORT_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+
+def iter_report_paths(inputs):
+    # Expand directories (recursively) into supported report files
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(REPORT_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+def analyze_report_file(file_path, include_text=False, summary=False):
+    # Runs in a worker process; errors are returned, not raised, so one bad file
+    # does not stop the batch
+    start = time.perf_counter()
+    result = {"file": file_path}
+    try:
+        # One page worker per process; the process pool already uses every core
+        text_parts, lab_values, seen = [], [], set()
+        for _, page_text in iter_report_pages(file_path, workers=1):
+            text_parts.append(page_text)
+            lab_values += extract_lab_values(page_text, seen)
+        text = "".join(text_parts)
+        result.update({
+            "text_chars": len(text),
+            "lab_values": lab_values,
+            "abnormal": [v["term"] for v in lab_values if v["status"] != "Normal"],
+        })
+        if include_text:
+            result["text"] = text
+        if summary:
+            # Zero-cost rule-based summary; no LLM calls in bulk mode
+            result["summary"] = summarize_offline(text, lab_values)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def analyze_reports(paths, workers=None, include_text=False, summary=False):
+    # Generator over results in completion order; at most 4 files per worker are in
+    # flight, so memory stays flat however many paths are passed
+    workers = workers or os.cpu_count() or 1
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(analyze_report_file, path, include_text, summary))
+            # Yield whatever has finished; block for one result only when the pool is full
+            full = len(pending) >= workers * 4
+            done, pending = wait(pending, timeout=None if full else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many lab reports and stream JSON lines")
+    parser.add_argument("inputs", nargs="+", help="Report files and/or directories")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    parser.add_argument("--include-text", action="store_true", help="Include extracted text in each record")
+    parser.add_argument("--summary", action="store_true", help="Add an offline rule-based summary to each record")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = failed = 0
+    start = time.perf_counter()
+    try:
+        for result in analyze_reports(iter_report_paths(args.inputs), args.workers, args.include_text, args.summary):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+            failed += "error" in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {count} reports ({failed} failed) in {elapsed:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import fitz
+import pytesseract
+from PIL import Image
+from components.image_preprocess import adaptive_preprocess, legacy_preprocess
+from components.metrics import propagate, timed
+
+# Text extraction shared by the Report Analyzer tab and the batch CLI; kept free of
+# Gradio and model imports so process-pool workers start quickly
+
+# Parallel OCR workers for scan-only PDF pages, and the resolution they are rasterized at
+REPORT_PAGE_WORKERS = int(os.getenv("REPORT_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+REPORT_OCR_DPI = int(os.getenv("REPORT_OCR_DPI", "300"))
+
+# REPORT_PREPROCESS=adaptive (default) or legacy; deskew and binarization are opt-in
+REPORT_PREPROCESS = os.getenv("REPORT_PREPROCESS", "adaptive")
+REPORT_DESKEW = os.getenv("REPORT_DESKEW", "0") == "1"
+REPORT_BINARIZE = os.getenv("REPORT_BINARIZE", "0") == "1"
+
+def preprocess_image(image_path):
+    # Accepts a path or a file-like object
+    image = Image.open(image_path)
+    if REPORT_PREPROCESS == "legacy":
+        return legacy_preprocess(image)
+    return adaptive_preprocess(image, deskew=REPORT_DESKEW, binarize_output=REPORT_BINARIZE)
+
+def ocr_image(image_path):
+    with timed("ocr.preprocess"):
+        image = preprocess_image(image_path)
+    with timed("ocr.tesseract"):
+        return pytesseract.image_to_string(image, lang='eng', config='--psm 6')
+
+def _ocr_png_bytes(png_bytes):
+    return ocr_image(io.BytesIO(png_bytes))
+
+def iter_pdf_pages(file_path, workers=None, dpi=None):
+    # Yields (page_number, text) in page order. Pages with a text layer are read
+    # directly; scan-only pages are rasterized and OCR'd in worker threads
+    # (Tesseract runs as a subprocess, so threads run in parallel). At most
+    # 2 x workers pages are held in memory at once.
+    workers = workers or REPORT_PAGE_WORKERS
+    dpi = dpi or REPORT_OCR_DPI
+    window = deque()
+
+    with fitz.open(file_path) as doc, ThreadPoolExecutor(max_workers=workers) as pool:
+        for page in doc:
+            with timed("pdf.text"):
+                text = page.get_text()
+            if text.strip():
+                window.append((page.number + 1, text))
+            else:
+                with timed("pdf.render"):
+                    png_bytes = page.get_pixmap(dpi=dpi).tobytes("png")
+                window.append((page.number + 1, pool.submit(propagate(_ocr_png_bytes), png_bytes)))
+
+            # Emit finished pages from the front; block once the window is full
+            while window and (len(window) >= 2 * workers or isinstance(window[0][1], str) or window[0][1].done()):
+                number, item = window.popleft()
+                yield number, item if isinstance(item, str) else item.result()
+
+        while window:
+            number, item = window.popleft()
+            yield number, item if isinstance(item, str) else item.result()
+
+def iter_report_pages(file_path, workers=None):
+    # PDFs stream page by page; an image is a single OCR'd page
+    if file_path.lower().endswith(".pdf"):
+        yield from iter_pdf_pages(file_path, workers)
+    else:
+        yield 1, ocr_image(file_path)
+
+def extract_pdf_text(file_path):
+    return "".join(text for _, text in iter_pdf_pages(file_path))
+
+def extract_report_text(file_path, workers=None):
+    return "".join(text for _, text in iter_report_pages(file_path, workers))
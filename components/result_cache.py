@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent content-addressed cache for OCR text and LLM summaries, shared by the
+# Report Analyzer and OCR + Summary tabs (and safe to share across worker processes).
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "cache/results.sqlite3")
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def image_hash(image):
+    # Hash decoded pixels (plus mode and size) so the same upload hits regardless of
+    # how the browser re-encoded it, without paying for a PNG encode
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def text_key(text, prompt_version):
+    # Summaries depend on the report text and the prompt that produced them
+    normalized = " ".join(text.split())
+    return content_hash(f"{prompt_version}\n{normalized}".encode("utf-8"))
+
+class ResultCache:
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes or int(RESULT_CACHE_MAX_MB * 1024 * 1024)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.commit()
+        self._stats = {}
+
+    def _count(self, namespace, field):
+        counts = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "writes": 0})
+        counts[field] += 1
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (time.time(), namespace, key),
+            )
+            self._conn.commit()
+            self._count(namespace, "hits")
+            return row[0]
+
+    def put(self, namespace, key, value):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+            self._count(namespace, "writes")
+
+    def _evict(self):
+        # Drop least recently used entries until back under 90% of the size cap
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT namespace, key, size FROM entries ORDER BY last_access")
+        victims = []
+        for namespace, key, size in rows:
+            if total <= target:
+                break
+            victims.append((namespace, key))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+
+    def get_or_compute(self, namespace, key, compute, should_cache=lambda value: True):
+        value = self.get(namespace, key)
+        if value is None:
+            value = compute()
+            if should_cache(value):
+                self.put(namespace, key, value)
+        return value
+
+    def get_stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            namespaces = {}
+            for namespace, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                namespaces[namespace] = dict(counts, hit_rate=counts["hits"] / lookups if lookups else None)
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes, "namespaces": namespaces}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache()
+    return _cache
@@ -0,0 +1,105 @@
+import os
+import re
+from components.metrics import timed
+from components.query_cache import QueryCache
+
+# Translates report HTML segment by segment: markup, values and units are kept as-is,
+# only the words between them are translated, repeated phrases are translated once,
+# and unique segments go through the model in batches. Recurring strings (term names,
+# "Reference Range:", ...) are cached per language across reports.
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+
+_TAG = re.compile(r"(<[^>]+>)")
+# Line breaks and sentence ends; keeps each segment well under the model's input limit
+_SENTENCE_BREAK = re.compile(r"(\n+|(?<=[.!?])\s+)")
+# Segments without a real word are left untranslated: values, arrows and units like mIU/L
+_WORD = re.compile(r"[^\W\d_]{3,}")
+
+_DIGIT = re.compile(r"\d")
+_SPACE = re.compile(r"(\s+)")
+
+def _has_words(text):
+    return any(_WORD.fullmatch(token.strip(".,:;!?()")) for token in text.split())
+
+def _split_values(text):
+    # Splits runs of numbers, ranges and units (e.g. "12.0-18.0 g/dL →") out of a
+    # segment as verbatim pieces, so the model never rewrites a value and labels like
+    # "Reference Range:" become one shared segment. Returns [(piece, translatable)].
+    runs = []
+    for token in _SPACE.split(text):
+        if not token:
+            continue
+        if token.isspace():
+            runs[-1][0] += token
+            continue
+        words = _has_words(token)
+        # Word-less tokens without digits (dashes, "&") stay inside the surrounding text
+        translatable = words or (runs[-1][1] if runs and not _DIGIT.search(token) else False)
+        if runs and runs[-1][1] == translatable:
+            runs[-1][0] += token
+        else:
+            runs.append([token, translatable])
+
+    pieces = []
+    for run, translatable in runs:
+        core = run.rstrip()
+        pieces.append((core, translatable))
+        if run != core:
+            pieces.append((run[len(core):], False))
+    return pieces
+
+_cache = QueryCache(max_size=int(os.getenv("TRANSLATION_CACHE_SIZE", "4096")), ttl_seconds=float("inf"))
+
+def split_segments(html):
+    # Returns a list of (piece, translatable) in document order
+    pieces = []
+    for part in _TAG.split(html):
+        if not part:
+            continue
+        if _TAG.fullmatch(part):
+            pieces.append((part, False))
+            continue
+        for chunk in _SENTENCE_BREAK.split(part):
+            if not chunk:
+                continue
+            core = chunk.strip()
+            if not _has_words(core):
+                pieces.append((chunk, False))
+                continue
+            # Keep surrounding whitespace outside the translated text
+            lead = chunk[:len(chunk) - len(chunk.lstrip())]
+            trail = chunk[len(chunk.rstrip()):]
+            if lead:
+                pieces.append((lead, False))
+            pieces += _split_values(core)
+            if trail:
+                pieces.append((trail, False))
+    return pieces
+
+def translate_segments(segments, language, translator, batch_size=TRANSLATION_BATCH_SIZE):
+    # Translate unique, uncached segments in batches; returns {segment: translation}
+    translations = {}
+    missing = []
+    for segment in dict.fromkeys(segments):
+        cached = _cache.get((language, segment))
+        if cached is None:
+            missing.append(segment)
+        else:
+            translations[segment] = cached
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        with timed("translate.batch"):
+            outputs = translator(batch, batch_size=len(batch), truncation=True)
+        for segment, output in zip(batch, outputs):
+            translations[segment] = output["translation_text"]
+            _cache.put((language, segment), output["translation_text"])
+    return translations
+
+def translate_html(html, language, translator, batch_size=TRANSLATION_BATCH_SIZE):
+    pieces = split_segments(html)
+    translations = translate_segments([p for p, t in pieces if t], language, translator, batch_size)
+    return "".join(translations[p] if t else p for p, t in pieces)
+
+def get_translation_stats():
+    return _cache.get_stats()
@@ -0,0 +1,225 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from components.embedding_store import load_embeddings
+from components.embeddings import encode_many
+from components.metrics import timed
+from components.model_registry import get_resource, register
+from components.vector_index import ExactIndex
+
+# Headless symptom/FAQ lookup for bulk jobs: queries are read in large chunks,
+# encoded in big batches, and scored against the whole store with one matrix
+# product per chunk. Results stream out as JSON lines.
+#   python -m components.triage intake.csv --column message --target both --output triage.jsonl
+#   python -m components.triage --serve --port 8010
+#   curl -d '{"queries": ["I have a fever"], "target": "symptom"}' http://127.0.0.1:8010/triage
+
+TRIAGE_CHUNK_SIZE = int(os.getenv("TRIAGE_CHUNK_SIZE", "4096"))
+TRIAGE_ENCODE_BATCH_SIZE = int(os.getenv("TRIAGE_ENCODE_BATCH_SIZE", "256"))
+
+# Same thresholds and env vars as the Symptom Checker and FAQ tabs
+SYMPTOM_MIN_SCORE = float(os.getenv("SYMPTOM_MIN_SCORE", "0.35"))
+FAQ_MIN_SCORE = float(os.getenv("FAQ_MIN_SCORE", "0.4"))
+
+TARGETS = ("symptom", "faq")
+
+def _store_loader(prefix):
+    # Always exact: a chunk of queries is one (n_queries x n_rows) matrix product
+    def load():
+        data = load_embeddings(prefix)
+        return data, ExactIndex(data['embeddings'], normalized=data['normalized'])
+    return load
+
+register("triage:symptom", _store_loader("models/symptom_embeddings"), priority=60, label="Triage symptom store")
+register("triage:faq", _store_loader("models/faq_embeddings"), priority=61, label="Triage FAQ store")
+
+def _symptom_result(data, scores, indices):
+    best = int(indices[0])
+    alternatives, seen = [], {data['diseases'][best]}
+    for idx, score in zip(indices[1:], scores[1:]):
+        if idx < 0:
+            continue
+        disease = data['diseases'][int(idx)]
+        if disease not in seen:
+            seen.add(disease)
+            alternatives.append({"disease": disease, "score": round(float(score), 4)})
+    return {
+        "disease": data['diseases'][best],
+        "treatment": data['treatments'][best],
+        "score": round(float(scores[0]), 4),
+        "low_confidence": bool(scores[0] < SYMPTOM_MIN_SCORE),
+        "alternatives": alternatives,
+    }
+
+def _faq_result(data, scores, indices):
+    best = int(indices[0])
+    questions = data.get('questions')
+    result = {
+        "answer": data['answers'][best],
+        "score": round(float(scores[0]), 4),
+        "low_confidence": bool(scores[0] < FAQ_MIN_SCORE),
+    }
+    if questions is not None:
+        result["question"] = questions[best]
+        result["related"] = [
+            {"question": questions[int(idx)], "score": round(float(score), 4)}
+            for idx, score in zip(indices[1:], scores[1:]) if idx >= 0
+        ]
+    return result
+
+_FORMATTERS = {"symptom": _symptom_result, "faq": _faq_result}
+
+def triage_batch(records, targets=TARGETS, k=3):
+    # records: list of {"id": ..., "text": ...}; returns them with one result per target.
+    # Duplicate texts in the chunk are encoded and scored once.
+    unique = list(dict.fromkeys(r["text"] for r in records))
+    if not unique:
+        return []
+    with timed("triage.encode"):
+        embeddings = encode_many(unique, batch_size=TRIAGE_ENCODE_BATCH_SIZE, convert_to_tensor=False)
+    row_of = {text: i for i, text in enumerate(unique)}
+
+    matches = {}
+    for target in targets:
+        data, index = get_resource(f"triage:{target}")
+        with timed("triage.search"):
+            scores, indices = index.search(embeddings, k)
+        matches[target] = (data, scores, indices)
+
+    results = []
+    for record in records:
+        row = row_of[record["text"]]
+        result = dict(record)
+        for target, (data, scores, indices) in matches.items():
+            result[target] = _FORMATTERS[target](data, scores[row], indices[row])
+        results.append(result)
+    return results
+
+def _text_of(value):
+    return " ".join(str(value or "").split())
+
+def iter_queries(path, column=None):
+    # CSV (header row; `column` or the first column), JSONL (`column` or "text"),
+    # or one query per line. Yields {"id", "text"}, keeping an "id" field if present.
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(stream)
+            field = column or reader.fieldnames[0]
+            for n, row in enumerate(reader, 1):
+                yield {"id": row.get("id", n), "text": _text_of(row.get(field))}
+        elif path.lower().endswith((".jsonl", ".ndjson")):
+            field = column or "text"
+            for n, line in enumerate(stream, 1):
+                if line.strip():
+                    row = json.loads(line)
+                    yield {"id": row.get("id", n), "text": _text_of(row.get(field))}
+        else:
+            for n, line in enumerate(stream, 1):
+                if line.strip():
+                    yield {"id": n, "text": _text_of(line)}
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def triage_stream(records, targets=TARGETS, k=3, chunk_size=TRIAGE_CHUNK_SIZE):
+    # Generator over results in input order, holding one chunk of queries at a time;
+    # empty queries are skipped
+    chunk = []
+    for record in records:
+        if record["text"]:
+            chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield from triage_batch(chunk, targets, k)
+            chunk = []
+    if chunk:
+        yield from triage_batch(chunk, targets, k)
+
+# --- JSON HTTP endpoint: POST /triage {"queries": [...], "target": "both", "k": 3}
+# Each query may be a string or {"id": ..., "text": ...}; results stream back as JSON lines.
+
+def _parse_targets(target):
+    return TARGETS if target in (None, "both") else (target,)
+
+class TriageHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.rstrip("/") != "/triage":
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            targets = _parse_targets(body.get("target"))
+            k = int(body.get("k", 3))
+            if k < 1:
+                raise ValueError("k must be at least 1")
+            if any(t not in TARGETS for t in targets):
+                raise ValueError(f"target must be one of {TARGETS + ('both',)}")
+            records = [
+                q if isinstance(q, dict) else {"id": n, "text": q}
+                for n, q in enumerate(body.get("queries", []), 1)
+            ]
+            records = [dict(r, text=_text_of(r.get("text"))) for r in records]
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_error(400, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for result in triage_stream(records, targets, k):
+            self.wfile.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port=8010, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), TriageHandler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk symptom/FAQ triage over CSV or JSONL queries")
+    parser.add_argument("input", nargs="?", help="Queries file (.csv, .jsonl or plain text; '-' for stdin)")
+    parser.add_argument("--column", help="CSV column / JSON field holding the query text")
+    parser.add_argument("--target", choices=TARGETS + ("both",), default="both")
+    parser.add_argument("--k", type=int, default=3, help="Matches per query (best + alternatives)")
+    parser.add_argument("--chunk-size", type=int, default=TRIAGE_CHUNK_SIZE, help="Queries encoded and scored per step")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    parser.add_argument("--serve", action="store_true", help="Run the JSON HTTP endpoint instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    args = parser.parse_args()
+    if args.k < 1:
+        parser.error("--k must be at least 1")
+
+    targets = _parse_targets(args.target)
+    if args.serve:
+        for target in targets:
+            get_resource(f"triage:{target}")
+        print(f"🩺 Triage API on http://{args.host}:{args.port}/triage")
+        serve(args.port, args.host).serve_forever()
+        return
+    if not args.input:
+        parser.error("an input file is required unless --serve is given")
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    start = time.perf_counter()
+    try:
+        for result in triage_stream(iter_queries(args.input, args.column), targets, args.k, args.chunk_size):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {count} queries in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
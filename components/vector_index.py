@@ -0,0 +1,142 @@
+import os
+import numpy as np
+from components.metrics import timed
+
+# Corpora at or above this size use the approximate IVF backend when backend="auto"
+IVF_MIN_ROWS = int(os.getenv("VECTOR_INDEX_IVF_MIN_ROWS", "50000"))
+# float16 rows are upcast this many at a time when scored
+SCORE_CHUNK_ROWS = 65536
+
+def to_numpy(embeddings):
+    # Accept torch tensors (as stored in the embedding pickles) or array-likes
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().cpu().numpy()
+    return np.asarray(embeddings, dtype=np.float32)
+
+def as_matrix(embeddings):
+    # Like to_numpy, but float16/float32 arrays (e.g. a memory-mapped store) are kept
+    # as they are, so their pages stay shared instead of being copied at load time
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().cpu().numpy()
+    embeddings = np.asarray(embeddings)
+    return embeddings if embeddings.dtype in (np.float16, np.float32) else embeddings.astype(np.float32)
+
+def normalize_rows(matrix):
+    matrix = to_numpy(matrix)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _top_k(scores, k):
+    # Row-wise top-k of a 2-D score matrix, sorted by descending score
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+def _scores(queries, vectors):
+    # queries (float32) against every row; float16 rows are upcast one chunk at a time
+    if vectors.dtype == np.float32:
+        return queries @ vectors.T
+    scores = np.empty((queries.shape[0], vectors.shape[0]), dtype=np.float32)
+    for start in range(0, vectors.shape[0], SCORE_CHUNK_ROWS):
+        chunk = vectors[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+        scores[:, start:start + chunk.shape[0]] = queries @ chunk.T
+    return scores
+
+class ExactIndex:
+    # Brute-force cosine search as one matrix product over pre-normalized rows
+    backend = "exact"
+
+    def __init__(self, embeddings, normalized=False):
+        # Pre-normalized input (e.g. a memory-mapped float32 or float16 store) is used without copying
+        self.vectors = as_matrix(embeddings) if normalized else normalize_rows(embeddings)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search(self, queries, k=5):
+        # Returns (scores, indices), each shaped (n_queries, k)
+        queries = normalize_rows(queries)
+        return _top_k(_scores(queries, self.vectors), k)
+
+class IVFIndex:
+    # Approximate search: rows are bucketed by spherical k-means centroid and only
+    # the n_probe closest buckets are scored exactly at query time
+    backend = "ivf"
+
+    def __init__(self, embeddings, normalized=False, n_lists=None, n_probe=8, n_iter=10, seed=0):
+        self.vectors = as_matrix(embeddings) if normalized else normalize_rows(embeddings)
+        n_rows = self.vectors.shape[0]
+        self.n_lists = max(1, min(n_rows, n_lists or int(np.sqrt(n_rows))))
+        self.n_probe = max(1, min(n_probe, self.n_lists))
+        self.centroids = self._train(n_iter, seed)
+
+        assignments = self._assign(self.vectors)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(self.n_lists + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.n_lists)]
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def _assign(self, vectors, chunk_size=65536):
+        # Nearest centroid per row, in chunks to bound the score matrix size
+        out = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk_size):
+            out[start:start + chunk_size] = (vectors[start:start + chunk_size] @ self.centroids.T).argmax(axis=1)
+        return out
+
+    def _train(self, n_iter, seed):
+        rng = np.random.default_rng(seed)
+        # Train on a sample; ~256 points per list is plenty for coarse quantization
+        sample_size = min(self.vectors.shape[0], self.n_lists * 256)
+        sample = to_numpy(self.vectors[rng.choice(self.vectors.shape[0], sample_size, replace=False)])
+        self.centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=self.n_lists) == 0
+            # Re-seed empty lists from random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            self.centroids = normalize_rows(sums)
+        return self.centroids
+
+    def search(self, queries, k=5):
+        queries = normalize_rows(queries)
+        probe = _top_k(queries @ self.centroids.T, self.n_probe)[1]
+
+        all_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        all_indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[i] for i in probe[row]])
+            if candidates.size == 0:
+                continue
+            scores, idx = _top_k((self.vectors[candidates] @ query)[None, :], k)
+            all_scores[row, :scores.shape[1]] = scores[0]
+            all_indices[row, :idx.shape[1]] = candidates[idx[0]]
+        return all_scores, all_indices
+
+def build_index(embeddings, backend=None, normalized=False, **kwargs):
+    # backend: "exact", "ivf" or "auto" (default from VECTOR_INDEX_BACKEND)
+    backend = backend or os.getenv("VECTOR_INDEX_BACKEND", "auto")
+    if backend == "auto":
+        backend = "ivf" if len(embeddings) >= IVF_MIN_ROWS else "exact"
+    if backend == "exact":
+        return ExactIndex(embeddings, normalized=normalized)
+    if backend == "ivf":
+        return IVFIndex(embeddings, normalized=normalized, **kwargs)
+    raise ValueError(f"Unknown vector index backend: {backend}")
+
+def top_k(index, query, k=5):
+    # Convenience wrapper for a single query: list of (row, score) pairs
+    with timed("search.topk"):
+        scores, indices = index.search(query, k)
+    return [(int(i), float(s)) for i, s in zip(indices[0], scores[0]) if i >= 0]
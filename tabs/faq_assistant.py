@@ -1,23 +1,67 @@
+import os
 import gradio as gr
-import pickle
-import torch
-from sentence_transformers import SentenceTransformer, util
+from components.embeddings import EMBED_BATCH_MAX_SIZE, encode_query
+from components.embedding_store import load_embeddings
+from components.hybrid_retriever import build_retriever
+from components.metrics import instrument
+from components.model_registry import get_resource, register
+from components.query_cache import TieredCache
+from components.vector_index import build_index, top_k
 
-# Load FAQ embeddings
-with open("models/faq_embeddings.pkl", "rb") as f:
-    faq_data = pickle.load(f)
+# Load FAQ embeddings (memory-mapped store in models/, converted from the .pkl on first run)
+# plus a BM25 index over the questions for the hybrid retriever
+def _load_faq_index():
+    faq_data = load_embeddings("models/faq_embeddings")
+    faq_index = build_index(faq_data['embeddings'], normalized=faq_data['normalized'])
+    return faq_data, faq_index, build_retriever(faq_data.get('questions'), faq_index, "faq")
+
+register("faq_index", _load_faq_index, priority=11, label="FAQ embeddings")
+
+# Results for repeated (normalized) questions, e.g. the scrolling examples
+faq_cache = TieredCache()
+
+# Below this cosine similarity the best FAQ is shown with a low-confidence note
+FAQ_MIN_SCORE = float(os.getenv("FAQ_MIN_SCORE", "0.4"))
+FAQ_TOP_K = 4
+
+# Related questions for the alternatives panel plus a low-confidence note
+def format_related(faq_data, matches):
+    lines = []
+    best_score = matches[0][1] if matches else 0.0
+    if best_score < FAQ_MIN_SCORE:
+        lines.append(f"⚠️ Low confidence match (score {best_score:.2f}). Try rephrasing your question.")
+    questions = faq_data.get('questions')
+    if questions is not None:
+        lines += [f"{questions[idx]} (score {score:.2f})" for idx, score in matches[1:]]
+    return "\n".join(lines)
+
+# Answer and related questions for an encoded query (hybrid lexical + dense ranking when available)
+def match_faq_embedding(embedding, user_query=None):
+    faq_data, faq_index, retriever = get_resource("faq_index")
+    if retriever is not None and user_query is not None:
+        matches = retriever.search(user_query, embedding, FAQ_TOP_K)
+    else:
+        matches = top_k(faq_index, embedding, FAQ_TOP_K)
+    return faq_data['answers'][matches[0][0]], format_related(faq_data, matches)
+
+# Exact/near-exact matches of a known question are answered without encoding the query
+def match_faq_fast_path(user_query):
+    faq_data, _, retriever = get_resource("faq_index")
+    matches = retriever.fast_path(user_query, FAQ_TOP_K) if retriever is not None else None
+    if matches is None:
+        return None
+    return faq_data['answers'][matches[0][0]], format_related(faq_data, matches)
 
 # Function to get answer from most similar FAQ
+@instrument("faq")
 def answer_faq(user_query):
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-    query_embedding = embedding_model.encode(user_query, convert_to_tensor=True)
-    similarities = util.pytorch_cos_sim(query_embedding, faq_data['embeddings'])[0]
-    idx = similarities.argmax().item()
-    return faq_data['answers'][idx]
+    return faq_cache.lookup(
+        user_query, encode_query, lambda embedding: match_faq_embedding(embedding, user_query), match_faq_fast_path
+    )
 
 # Clear input and output
 def clear_faq():
-    return "", ""
+    return "", "", ""
 
 # UI layout function for FAQ Support tab
 def faq_assistant_tab():
@@ -31,9 +75,11 @@ def faq_assistant_tab():
             faq_clear = gr.Button("Clear")
         with gr.Column(scale=1):
             faq_output = gr.Textbox(label="Answer", interactive=False, lines=6.9)
+            with gr.Accordion("🔍 Related Questions", open=False):
+                faq_related = gr.Textbox(label=None, interactive=False, lines=3, container=False)
 
-    faq_btn.click(answer_faq, faq_input, outputs=faq_output)
-    faq_clear.click(clear_faq, outputs=[faq_input, faq_output])
+    faq_btn.click(answer_faq, faq_input, outputs=[faq_output, faq_related], concurrency_limit=EMBED_BATCH_MAX_SIZE)
+    faq_clear.click(clear_faq, outputs=[faq_input, faq_output, faq_related])
 
     gr.Markdown("""
     <div style="height: auto; min-height: 100px; width: 100%; max-width: 65%; margin: 15px auto; overflow: hidden; position: relative; background: linear-gradient(to right, #1c2f3a 0%, #000000 50%, #1c2f3a 100%); border-radius: 12px; box-shadow: 0 2px 12px rgba(0,0,0,0.4); text-align: center; padding: 16px 24px; box-sizing: border-box;">
@@ -1,13 +1,57 @@
+import os
 import gradio as gr
-from components.llm_ocr_gcv import extract_text_gcv
-from components.palm_summarizer import summarize_with_palm
+from components import llm_client
+from components.llm_ocr_gcv import GCV_BACKEND, extract_text_gcv
+from components.metrics import instrument, timed
+from components.offline_summarizer import summarize_offline
+from components.palm_summarizer import MODEL_NAME, PROMPT_VERSION, summarize_with_palm_stream
+from components.result_cache import get_result_cache, image_hash, text_key
 
-def process_image_with_summary(image):
-    text = extract_text_gcv(image)
+# Error messages are returned as text, so only successful results are cached
+def _is_success(value):
+    return "❌" not in value
+
+# Gemini gets this long before the offline summary is used instead
+SUMMARY_LATENCY_BUDGET_SECONDS = float(os.getenv("SUMMARY_LATENCY_BUDGET_SECONDS", "20"))
+
+SUMMARY_MODES = ["🧠 AI (Gemini)", "⚡ Fast (offline)"]
+
+# Cache namespaces carry the OCR/LLM backend, so stub and fake-server results
+# never mix with real Google Vision and Gemini output
+OCR_NAMESPACE = f"ocr:gcv:{GCV_BACKEND}"
+SUMMARY_NAMESPACE = f"summary:palm:{llm_client.backend_id(MODEL_NAME)}"
+
+# Generator: the summary streams into the UI as Gemini produces it
+@instrument("ocr_summary")
+def process_image_with_summary(image, mode=SUMMARY_MODES[0]):
+    cache = get_result_cache()
+    if image is None:
+        text = extract_text_gcv(image)
+    else:
+        with timed("ocr.hash"):
+            key = image_hash(image)
+        text = cache.get_or_compute(OCR_NAMESPACE, key, lambda: extract_text_gcv(image), _is_success)
     if "❌" in text or len(text.strip()) < 10:
-        return text, ""
-    summary = summarize_with_palm(text)
-    return text, summary
+        yield text, ""
+        return
+
+    if mode == SUMMARY_MODES[1]:
+        with timed("summary.offline"):
+            summary = summarize_offline(text)
+        yield text, summary
+        return
+
+    summary_key = text_key(text, PROMPT_VERSION)
+    summary = cache.get(SUMMARY_NAMESPACE, summary_key)
+    if summary is None:
+        for summary in summarize_with_palm_stream(text, timeout=SUMMARY_LATENCY_BUDGET_SECONDS):
+            yield text, summary
+        if _is_success(summary):
+            cache.put(SUMMARY_NAMESPACE, summary_key, summary)
+        else:
+            # Gemini was slow or unavailable: fall back to the rule-based summary
+            summary = summarize_offline(text) + f"\n\n_⚡ Offline summary shown because Gemini did not respond: {summary}_"
+    yield text, summary
 
 def image_ocr_llm_tab():
     with gr.Tab("🧾 OCR + Summary"):
@@ -18,6 +62,7 @@ def image_ocr_llm_tab():
                 with gr.Accordion("🖼 Upload your Medical Report", open=False):
                     img_input = gr.Image(type="pil", label="", height=160)
 
+                summary_mode = gr.Radio(choices=SUMMARY_MODES, value=SUMMARY_MODES[0], label="Summary Mode")
                 extract_btn = gr.Button("Extract & Summarize", elem_id="process-btn")
                 clear_btn = gr.Button("Clear")
 
@@ -42,7 +87,7 @@ def image_ocr_llm_tab():
             queue=False
         ).then(
             fn=process_image_with_summary,
-            inputs=img_input,
+            inputs=[img_input, summary_mode],
             outputs=[extracted_text, summarized_text],
             show_progress=True
         ).then(
@@ -1,104 +1,43 @@
 import gradio as gr
-import torch
-import fitz
-import pytesseract
-import re
-import os
-import google.generativeai as genai
-from PIL import Image, ImageEnhance, ImageFilter
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-
-# Configure Gemini (PaLM) API
-genai.configure(api_key=os.getenv("PALM_API_KEY"))
-model = genai.GenerativeModel("gemini-pro")
-
-# Translation model (e.g., for Hindi)
-translation_tokenizer = AutoTokenizer.from_pretrained("Helsinki-NLP/opus-mt-en-hi")
-translation_model = AutoModelForSeq2SeqLM.from_pretrained("Helsinki-NLP/opus-mt-en-hi")
-translator = pipeline("translation", model=translation_model, tokenizer=translation_tokenizer)
-
+from components import llm_client
+from components.lab_extraction import extract_lab_values
+from components.metrics import instrument, timed
+from components.model_registry import get_resource, register
+from components.report_text import iter_report_pages
+from components.result_cache import file_hash, get_result_cache, text_key
+from components.translation_utils import translate_html
+
+# Gemini (PaLM) model used for the report summary, called through the shared LLM client
+GEMINI_MODEL_NAME = "gemini-pro"
+llm_client.register_model(GEMINI_MODEL_NAME, priority=41, label="Gemini Pro (report analyzer)")
+
+# Translation models per output language (e.g., for Hindi), loaded on first use.
+# Add a MarianMT model here to offer another output language.
 language_models = {
-    "Hindi": translator,
+    "Hindi": "Helsinki-NLP/opus-mt-en-hi",
 }
 
-# Lab thresholds for rule-based explanation
-lab_thresholds = {
-    # Blood Parameters
-    "Hemoglobin": {"low": 12.0, "high": 18.0, "unit": "g/dL"},
-    "Total Erythrocytes": {"low": 4.5, "high": 6.0, "unit": "million/µL"},
-    "HCT": {"low": 36.0, "high": 50.0, "unit": "%"},
-    "MCV": {"low": 80.0, "high": 100.0, "unit": "fL"},
-    "MCH": {"low": 27.0, "high": 33.0, "unit": "pg"},
-    "MCHC": {"low": 32.0, "high": 36.0, "unit": "g/dL"},
-    "RDW": {"low": 11.5, "high": 14.5, "unit": "%"},
-    "Platelets": {"low": 150, "high": 450, "unit": "thousand/µL"},
-    "MPV": {"low": 7.5, "high": 11.5, "unit": "fL"},
-
-    # White Blood Cells
-    "WBC": {"low": 4.0, "high": 11.0, "unit": "thousand/µL"},
-    "Neutrophils": {"low": 40, "high": 75, "unit": "%"},
-    "Lymphocytes": {"low": 20, "high": 40, "unit": "%"},
-    "Monocytes": {"low": 2, "high": 8, "unit": "%"},
-    "Eosinophils": {"low": 1, "high": 6, "unit": "%"},
-    "Basophils": {"low": 0, "high": 1, "unit": "%"},
-
-    # Kidney Function
-    "Creatinine": {"low": 0.6, "high": 1.3, "unit": "mg/dL"},
-    "BUN": {"low": 7, "high": 20, "unit": "mg/dL"},
-    "Urea": {"low": 10, "high": 50, "unit": "mg/dL"},
-
-    # Liver Function
-    "Bilirubin": {"low": 0.1, "high": 1.2, "unit": "mg/dL"},
-    "SGPT": {"low": 7, "high": 56, "unit": "U/L"},  # ALT
-    "SGOT": {"low": 8, "high": 45, "unit": "U/L"},  # AST
-    "Alkaline Phosphatase": {"low": 44, "high": 147, "unit": "U/L"},
-
-    # Lipid Profile
-    "HDL": {"low": 40, "high": 60, "unit": "mg/dL"},
-    "LDL": {"low": 0, "high": 100, "unit": "mg/dL"},
-    "Total Cholesterol": {"low": 125, "high": 200, "unit": "mg/dL"},
-    "Triglycerides": {"low": 0, "high": 150, "unit": "mg/dL"},
-
-    # Thyroid
-    "TSH": {"low": 0.4, "high": 4.0, "unit": "mIU/L"},
-    "T3": {"low": 80, "high": 200, "unit": "ng/dL"},
-    "T4": {"low": 4.5, "high": 12.5, "unit": "µg/dL"},
-
-    # Diabetes / Sugar
-    "Glucose": {"low": 70, "high": 140, "unit": "mg/dL"},
-    "HbA1c": {"low": 4.0, "high": 5.6, "unit": "%"},
-    "Fasting Blood Sugar": {"low": 70, "high": 99, "unit": "mg/dL"},
-    "Postprandial Blood Sugar": {"low": 70, "high": 140, "unit": "mg/dL"},
-
-    # Electrolytes
-    "Sodium": {"low": 135, "high": 145, "unit": "mmol/L"},
-    "Potassium": {"low": 3.5, "high": 5.0, "unit": "mmol/L"},
-    "Chloride": {"low": 96, "high": 106, "unit": "mmol/L"},
-    "Calcium": {"low": 8.5, "high": 10.5, "unit": "mg/dL"},
-    "Uric Acid": {"low": 3.5, "high": 7.2, "unit": "mg/dL"},
-
-    # Inflammation Markers
-    "CRP": {"low": 0, "high": 3, "unit": "mg/L"},
-    "ESR": {"low": 0, "high": 20, "unit": "mm/hr"},
-
-    # Vitamins
-    "Vitamin D": {"low": 20, "high": 50, "unit": "ng/mL"},
-    "Vitamin B12": {"low": 200, "high": 900, "unit": "pg/mL"},
-
-    # Aliases
-    "ALT": {"low": 7, "high": 56, "unit": "U/L"},
-    "AST": {"low": 8, "high": 45, "unit": "U/L"},
-}
+def _translator_loader(model_name):
+    def load():
+        from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+        translation_tokenizer = AutoTokenizer.from_pretrained(model_name)
+        translation_model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        return pipeline("translation", model=translation_model, tokenizer=translation_tokenizer)
+    return load
 
-def preprocess_image(image_path):
-    image = Image.open(image_path)
-    image = image.convert('L')
-    image = image.filter(ImageFilter.MedianFilter())
-    image = ImageEnhance.Contrast(image).enhance(2)
-    return image
+for _language, _model_name in language_models.items():
+    register(f"translator:{_language}", _translator_loader(_model_name), priority=50, label=f"Translator ({_language})")
 
-def summarize_with_gemini(cleaned_lines):
-    prompt = f"""
+def get_translator(language):
+    return get_resource(f"translator:{language}")
+
+# Bump when the prompt changes so cached summaries are not reused
+GEMINI_PROMPT_VERSION = "report-v1"
+# Includes the LLM backend, so fake-server summaries never mix with Gemini's
+SUMMARY_NAMESPACE = f"summary:gemini_report:{llm_client.backend_id(GEMINI_MODEL_NAME)}"
+
+def build_gemini_prompt(cleaned_lines):
+    return f"""
 You are a medical assistant. Summarize this lab report in clear, simple language:
 1. Summary in 2–3 lines
 2. Explain abnormal values
@@ -107,71 +46,98 @@ You are a medical assistant. Summarize this lab report in clear, simple language
 Data:
 {chr(10).join(cleaned_lines[:6])}
 """
+
+def summarize_with_gemini_stream(cleaned_lines):
+    # Yields the summary generated so far; failures end the stream with an error line
+    summary = ""
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip() if response and response.text else "(No summary returned)"
+        for summary in llm_client.stream(build_gemini_prompt(cleaned_lines), GEMINI_MODEL_NAME):
+            yield summary
     except Exception as e:
-        return f"(Gemini summarization failed: {e})"
+        yield f"(Gemini summarization failed: {e})"
+        return
+    yield summary.strip() if summary.strip() else "(No summary returned)"
+
+def summarize_with_gemini(cleaned_lines):
+    summary = ""
+    for summary in summarize_with_gemini_stream(cleaned_lines):
+        pass
+    return summary
 
+def _format_output(rule_explanation, gpt_summary):
+    return (
+        "<h4 style='color:#ffa500;'>📌 Rule-Based Results:</h4><br>" +
+        rule_explanation +
+        "<hr><h4 style='color:#77dd77;'>🧠 Gemini Summary:</h4><br>" +
+        gpt_summary
+    )
+
+# Generator: the Gemini summary streams into the output as it is generated
+@instrument("report")
 def ocr_and_explain(file, language):
     if not file:
-        return "Please upload a valid report.", ""
+        yield "Please upload a valid report.", ""
+        return
 
     file_path = file.name
-    text = ""
 
+    # Pages stream in (scan-only PDF pages are OCR'd in parallel) and are analyzed as they
+    # arrive; text of a previously seen file is served from the result cache
+    cache = get_result_cache()
+    text_parts, lab_values, seen = [], [], set()
     try:
-        if file_path.lower().endswith(".pdf"):
-            doc = fitz.open(file_path)
-            for page in doc:
-                text += page.get_text()
-        else:
-            image = preprocess_image(file_path)
-            text = pytesseract.image_to_string(image, lang='eng', config='--psm 6')
+        with timed("report.hash"):
+            report_key = file_hash(file_path)
+        cached_text = cache.get("ocr:report", report_key)
+        pages = [(1, cached_text)] if cached_text is not None else iter_report_pages(file_path)
+        for _, page_text in pages:
+            text_parts.append(page_text)
+            with timed("lab.extract"):
+                lab_values += extract_lab_values(page_text, seen)
     except Exception as e:
-        return f"Error reading file: {e}", ""
+        yield f"Error reading file: {e}", ""
+        return
 
+    text = "".join(text_parts)
+    if cached_text is None and text.strip():
+        cache.put("ocr:report", report_key, text)
     if not text.strip():
-        return "No readable text found in the report.", ""
+        yield "No readable text found in the report.", ""
+        return
 
     rule_lines, cleaned_lines = [], []
 
-    for term, values in lab_thresholds.items():
-        for line in text.splitlines():
-            if term.lower() in line.lower():
-                try:
-                    value_str = ''.join(c for c in line if c.isdigit() or c in ['.', '-'])
-                    value = float(value_str)
-                    status = "Low" if value < values["low"] else "High" if value > values["high"] else "Normal"
-
-                    html_line = (
-                        f"<b>{term}</b>: {value:.2f} {values['unit']} → <b>{status}</b><br>"
-                        f"<i>Reference Range: {values['low']}-{values['high']} {values['unit']}</i><br><br>"
-                    )
-                    rule_lines.append(html_line)
-                    cleaned_lines.append(f"{term}: {value:.2f} {values['unit']} → {status} (Normal: {values['low']}-{values['high']} {values['unit']})")
-                except:
-                    continue
+    for result in lab_values:
+        term, value, unit, status = result["term"], result["value"], result["unit"], result["status"]
+        html_line = (
+            f"<b>{term}</b>: {value:.2f} {unit} → <b>{status}</b><br>"
+            f"<i>Reference Range: {result['low']}-{result['high']} {unit}</i><br><br>"
+        )
+        rule_lines.append(html_line)
+        cleaned_lines.append(f"{term}: {value:.2f} {unit} → {status} (Normal: {result['low']}-{result['high']} {unit})")
 
     rule_explanation = "\n".join(rule_lines) if rule_lines else "No known lab terms detected."
 
-    # 🔁 Gemini summary
-    gpt_summary = summarize_with_gemini(cleaned_lines)
+    # 🔁 Gemini summary (streamed unless cached; translated output is only shown once complete)
+    summary_key = text_key("\n".join(cleaned_lines[:6]), GEMINI_PROMPT_VERSION)
+    gpt_summary = cache.get(SUMMARY_NAMESPACE, summary_key)
+    if gpt_summary is None:
+        for gpt_summary in summarize_with_gemini_stream(cleaned_lines):
+            if language == "English":
+                yield text, _format_output(rule_explanation, gpt_summary)
+        if not gpt_summary.startswith("(Gemini summarization failed"):
+            cache.put(SUMMARY_NAMESPACE, summary_key, gpt_summary)
 
-    final_output = (
-        "<h4 style='color:#ffa500;'>📌 Rule-Based Results:</h4><br>" +
-        rule_explanation +
-        "<hr><h4 style='color:#77dd77;'>🧠 Gemini Summary:</h4><br>" +
-        gpt_summary
-    )
+    final_output = _format_output(rule_explanation, gpt_summary)
 
     if language != "English" and language in language_models:
         try:
-            final_output = language_models[language](final_output)[0]['translation_text']
+            with timed("translate"):
+                final_output = translate_html(final_output, language, get_translator(language))
         except Exception as e:
             final_output = f"Translation failed: {e}"
 
-    return text, final_output
+    yield text, final_output
 
 def report_analyzer_tab():
     gr.Markdown("## 🧾 Upload Report & Get Explanation", elem_classes="centered-text")
@@ -184,7 +150,7 @@ def report_analyzer_tab():
                 file_types=[".png", ".jpg", ".jpeg", ".pdf"]
             )
             language_select = gr.Radio(
-                choices=["English", "Hindi"],
+                choices=["English"] + list(language_models),
                 value="English",
                 label="Select Output Language"
             )
@@ -1,23 +1,72 @@
+import os
 import gradio as gr
-import pickle
-import torch
-from sentence_transformers import SentenceTransformer, util
+from components.embeddings import EMBED_BATCH_MAX_SIZE, encode_query
+from components.embedding_store import load_embeddings
+from components.hybrid_retriever import build_retriever
+from components.metrics import instrument
+from components.model_registry import get_resource, register
+from components.query_cache import TieredCache
+from components.vector_index import build_index, top_k
 
-# Load symptom embeddings (from models/)
-with open("models/symptom_embeddings.pkl", "rb") as f:
-    symptom_data = pickle.load(f)
+# Load symptom embeddings (memory-mapped store in models/, converted from the .pkl on first run)
+# plus a BM25 index over the symptom phrases for the hybrid retriever
+def _load_symptom_index():
+    symptom_data = load_embeddings("models/symptom_embeddings")
+    symptom_index = build_index(symptom_data['embeddings'], normalized=symptom_data['normalized'])
+    return symptom_data, symptom_index, build_retriever(symptom_data.get('symptoms'), symptom_index, "symptom")
+
+register("symptom_index", _load_symptom_index, priority=10, label="Symptom embeddings")
+
+# Results for repeated (normalized) symptom statements
+symptom_cache = TieredCache()
+
+# Matches scoring below this cosine similarity are flagged as low confidence
+SYMPTOM_MIN_SCORE = float(os.getenv("SYMPTOM_MIN_SCORE", "0.35"))
+SYMPTOM_TOP_K = 5
+
+# Other likely conditions (one line per distinct disease) plus a low-confidence note
+def format_alternatives(symptom_data, matches):
+    lines, seen = [], set()
+    best_score = matches[0][1] if matches else 0.0
+    if best_score < SYMPTOM_MIN_SCORE:
+        lines.append(f"⚠️ Low confidence match (score {best_score:.2f}). Try describing your symptoms in more detail.")
+    for idx, score in matches[1:]:
+        disease = symptom_data['diseases'][idx]
+        if disease in seen or disease == symptom_data['diseases'][matches[0][0]]:
+            continue
+        seen.add(disease)
+        lines.append(f"{disease} (score {score:.2f})")
+    return "\n".join(lines)
+
+def _symptom_result(symptom_data, matches):
+    idx = matches[0][0]
+    return symptom_data['diseases'][idx], symptom_data['treatments'][idx], format_alternatives(symptom_data, matches)
+
+# Disease, treatment and alternatives for an encoded symptom statement (hybrid ranking when available)
+def match_symptom_embedding(embedding, user_symptom=None):
+    symptom_data, symptom_index, retriever = get_resource("symptom_index")
+    if retriever is not None and user_symptom is not None:
+        matches = retriever.search(user_symptom, embedding, SYMPTOM_TOP_K)
+    else:
+        matches = top_k(symptom_index, embedding, SYMPTOM_TOP_K)
+    return _symptom_result(symptom_data, matches)
+
+# Exact/near-exact matches of a known symptom phrase skip the embedding model
+def match_symptom_fast_path(user_symptom):
+    symptom_data, _, retriever = get_resource("symptom_index")
+    matches = retriever.fast_path(user_symptom, SYMPTOM_TOP_K) if retriever is not None else None
+    return _symptom_result(symptom_data, matches) if matches is not None else None
 
 # Function to identify disease
+@instrument("symptom")
 def identify_disease(user_symptom):
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-    input_embedding = embedding_model.encode(user_symptom, convert_to_tensor=True)
-    similarities = util.pytorch_cos_sim(input_embedding, symptom_data['embeddings'])[0]
-    idx = similarities.argmax().item()
-    return symptom_data['diseases'][idx], symptom_data['treatments'][idx]
+    return symptom_cache.lookup(
+        user_symptom, encode_query, lambda embedding: match_symptom_embedding(embedding, user_symptom), match_symptom_fast_path
+    )
 
 # Clear button logic
 def clear_symptoms():
-    return "", "", ""
+    return "", "", "", ""
 
 # Main UI layout for Symptom Checker tab
 def symptom_checker_tab():
@@ -32,9 +81,12 @@ def symptom_checker_tab():
         with gr.Column(scale=1):
             predicted_disease = gr.Textbox(label="Predicted Disease", interactive=False, lines=2.2)
             suggested_treatment = gr.Textbox(label="Suggested Treatment", interactive=False, lines=2.2)
+            with gr.Accordion("🔍 Other Possible Conditions", open=False):
+                other_matches = gr.Textbox(label=None, interactive=False, lines=3, container=False)
 
-    symptom_btn.click(identify_disease, symptom_input, outputs=[predicted_disease, suggested_treatment])
-    symptom_clear.click(clear_symptoms, outputs=[symptom_input, predicted_disease, suggested_treatment])
+    symptom_btn.click(identify_disease, symptom_input, outputs=[predicted_disease, suggested_treatment, other_matches],
+                      concurrency_limit=EMBED_BATCH_MAX_SIZE)
+    symptom_clear.click(clear_symptoms, outputs=[symptom_input, predicted_disease, suggested_treatment, other_matches])
 
     gr.Markdown("""
     <!-- Scrolling Example Symptom Statements -->
@@ -1,30 +1,124 @@
+import os
+import threading
+import time
 import gradio as gr
-import torch
-from transformers import BlenderbotTokenizer, BlenderbotForConditionalGeneration
+from components.chat_context import ContextBuilder
+from components.chat_sessions import SessionRegistry
+from components.metrics import instrument, propagate, record_stage, timed
+from components.micro_batcher import MicroBatcher
+from components.model_registry import get_resource, register
 
-# Load BlenderBot model
+# BlenderBot model (fp32 or int8 runtime, see components/chat_runtime.py), loaded on first use.
+# The context builder feeds recent turns to the model under CHAT_CONTEXT_MAX_TOKENS.
 model_id = "facebook/blenderbot-1B-distill"
-tokenizer = BlenderbotTokenizer.from_pretrained(model_id)
-model = BlenderbotForConditionalGeneration.from_pretrained(model_id)
 
-chat_history = []
+def _load_chat_model():
+    from components.chat_runtime import load_chat_model
+    tokenizer, model = load_chat_model(model_id)
+    return tokenizer, model, ContextBuilder(tokenizer)
 
-# Response function
-def respond(user_message):
-    global chat_history
-    inputs = tokenizer([user_message], return_tensors="pt").to(model.device)
-    with torch.no_grad():
+register("chat_model", _load_chat_model, priority=30, label="Therapy chat (BlenderBot-1B)")
+
+# Per-session chat state; idle sessions are evicted and total memory is capped
+chat_sessions = SessionRegistry()
+
+# "stream": yield partial replies token-by-token (lowest time-to-first-token)
+# "batch": coalesce concurrent users' messages into one padded generate call (highest throughput)
+# "single": one blocking generate call per message
+CHAT_MODE = os.getenv("CHAT_MODE", "stream")
+CHAT_BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", "8"))
+CHAT_BATCH_MAX_WAIT_MS = float(os.getenv("CHAT_BATCH_MAX_WAIT_MS", "50"))
+# Longest wait for the next streamed token before the reply is abandoned
+CHAT_STREAM_TIMEOUT_SECONDS = float(os.getenv("CHAT_STREAM_TIMEOUT_SECONDS", "60"))
+
+# Each context is a list of input token ids built by context_builder
+def generate_replies(contexts):
+    import torch
+    tokenizer, model, _ = get_resource("chat_model")
+    inputs = tokenizer.pad({"input_ids": contexts}, return_tensors="pt").to(model.device)
+    with timed("chat.generate"), torch.inference_mode():
         reply_ids = model.generate(**inputs, max_new_tokens=80, do_sample=False)
-    reply = tokenizer.decode(reply_ids[0], skip_special_tokens=True)
-    chat_history.append((user_message, reply))
-    formatted_chat = "\n\n".join([f"👤 You: {u}\n\n🤖 Bot: {b}\n\n------" for u, b in chat_history])
-    return "", formatted_chat.strip()
+    with timed("chat.decode"):
+        return tokenizer.batch_decode(reply_ids, skip_special_tokens=True)
+
+def generate_reply(context):
+    return generate_replies([context])[0]
+
+# Background inference worker for "batch" mode; get_stats() reports fill rate and queue wait
+generation_batcher = MicroBatcher(
+    generate_replies,
+    max_batch_size=CHAT_BATCH_MAX_SIZE,
+    max_wait_ms=CHAT_BATCH_MAX_WAIT_MS,
+    name="chat-generation-batcher",
+)
+
+# Yields the reply text generated so far; generate runs in a worker thread
+def stream_reply(context):
+    import torch
+    from transformers import TextIteratorStreamer
+    tokenizer, model, _ = get_resource("chat_model")
+    inputs = tokenizer.pad({"input_ids": [context]}, return_tensors="pt").to(model.device)
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True, timeout=CHAT_STREAM_TIMEOUT_SECONDS)
+    failure = []
+
+    def run():
+        # A failed generate must still end the stream, or the consumer waits forever
+        try:
+            with timed("chat.generate"), torch.inference_mode():
+                model.generate(**inputs, max_new_tokens=80, do_sample=False, streamer=streamer)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            streamer.end()
+
+    worker = threading.Thread(target=propagate(run), daemon=True)
+    start = time.perf_counter()
+    worker.start()
+    reply = ""
+    for text in streamer:
+        if not reply and text:
+            record_stage("chat.first_token", time.perf_counter() - start, start)
+        reply += text
+        yield reply
+    worker.join()
+    if failure:
+        raise failure[0]
+
+# Response function (generator, so Gradio updates the chat display as tokens arrive)
+@instrument("chat")
+def respond(user_message, session):
+    session = chat_sessions.get(session)
+    try:
+        if session.evicted:
+            session.evicted = False
+            gr.Warning("Your earlier messages were cleared to free memory, so this conversation starts over.")
+        context_builder = get_resource("chat_model")[2]
+        with timed("chat.tokenize"):
+            user_ids = context_builder.encode_utterance(user_message, from_user=True)
+            context = context_builder.build(session, user_ids)
+
+        reply = ""
+        if CHAT_MODE == "stream":
+            for reply in stream_reply(context):
+                yield "", session.preview(user_message, reply).strip(), session
+        elif CHAT_MODE == "batch":
+            reply = generation_batcher(context)
+        else:
+            reply = generate_reply(context)
+
+        with timed("chat.tokenize"):
+            reply_ids = context_builder.encode_utterance(reply, from_user=False)
+        transcript = session.add_turn(user_message, reply, tokens=(user_ids, reply_ids))
+        chat_sessions.enforce_limits()
+        yield "", transcript.strip(), session
+    finally:
+        # Also runs if the user leaves mid-stream and Gradio closes the generator
+        chat_sessions.done(session)
 
 # Clear function
-def clear_chat():
-    global chat_history
-    chat_history = []
-    return "", ""
+def clear_chat(session):
+    chat_sessions.release(session)
+    return "", "", None
 
 # UI function
 # UI function
@@ -35,6 +129,8 @@ def therapy_chat_tab():
         elem_classes="centered-text"
     )
 
+    chat_state = gr.State(None)
+
     with gr.Row():
         with gr.Column():
             user_input = gr.Textbox(placeholder="How are you feeling?", label="🗣 Your Message", lines=8)
@@ -44,8 +140,10 @@ def therapy_chat_tab():
             with gr.Accordion("📜 Chat History", open=True):
                 chat_display = gr.Textbox(label=None, interactive=False, lines=13.8, container=False)
 
-    submit_btn.click(respond, user_input, outputs=[user_input, chat_display])
-    clear_btn.click(clear_chat, outputs=[user_input, chat_display])
+    # Batch mode needs concurrent requests in flight for the worker to fill its batches
+    submit_btn.click(respond, [user_input, chat_state], outputs=[user_input, chat_display, chat_state],
+                     concurrency_limit=CHAT_BATCH_MAX_SIZE if CHAT_MODE == "batch" else 1)
+    clear_btn.click(clear_chat, chat_state, outputs=[user_input, chat_display, chat_state])
 
     gr.Markdown(
         """